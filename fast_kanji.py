@@ -22,15 +22,188 @@ https://github.com/stormoid/fast_kanji
 ["Small tool to quickly Search for Kanji based on the English meaning of components.
 This way, if you know your radicals, you won't need to play where's waldo to find kanjis quickly"]
 """
+import argparse
 import json
-import os
 import tkinter as tk
+from bisect import bisect_left
 import webbrowser
+from concurrent.futures import ThreadPoolExecutor
 from tkinter import ttk
 from tkinter import scrolledtext
 
+from kanji_cache import QueryCache
+from kanji_engine import KanjiEngine, LRUCache
+from kanji_profiling import Profiler
+
+# Delay between the last keystroke and the search it triggers
+SEARCH_DEBOUNCE_MS = 100
+# How often the Tk thread checks for finished background tasks
+TASK_POLL_MS = 10
+# Above this many separate edits, a listbox is refilled in one call instead of patched
+MAX_LISTBOX_EDITS = 32
+# Rows a WindowedListbox renders at a time, and how far down it scrolls before rendering more
+LISTBOX_PAGE_SIZE = 100
+LISTBOX_LOAD_MORE_FRACTION = 0.8
+# Where --profile writes its timings when the window closes
+PROFILE_FILE = "fast_kanji_profile.json"
+TRACE_FILE = "fast_kanji_trace.json"
+PROFILE_OVERLAY_REFRESH_MS = 500
+# Rendered Kanji details kept in memory, and how many results around the selection are rendered ahead
+DETAILS_CACHE_SIZE = 512
+DETAILS_PREFETCH_COUNT = 30
+# Kanji breakdowns inserted into the decompose window per Tk event loop turn
+DECOMPOSE_CHUNK_SIZE = 200
+# Range filters (attribute, label, highest value) and sort orders (label, attribute, descending) of the results
+RANGE_FILTERS = [("strokes", "Strokes", 30), ("grade", "Grade", 10), ("jlpt", "JLPT", 4), ("freq", "Freq", 2501)]
+SORT_OPTIONS = [
+    ("Frequency", None, False),
+    ("Strokes ↑", "strokes", False),
+    ("Strokes ↓", "strokes", True),
+    ("Grade ↑", "grade", False),
+    ("Grade ↓", "grade", True),
+    ("JLPT ↑", "jlpt", False),
+    ("JLPT ↓", "jlpt", True),
+]
+
+
+def missing_runs(items, present):
+    """Returns the (start, end) index runs of the items that are not in present."""
+    runs = []
+    start = None
+    for index, item in enumerate(items):
+        if item in present:
+            if start is not None:
+                runs.append((start, index))
+                start = None
+        elif start is None:
+            start = index
+    if start is not None:
+        runs.append((start, len(items)))
+    return runs
+
+
+def sync_listbox(listbox, old_items, new_items):
+    """Turns a listbox showing old_items into one showing new_items by deleting and inserting only the differences.
+
+    Both lists are expected to follow the same overall order (e.g. RADKFILE or Kanji ID order);
+    otherwise, or when there are too many differences, the listbox is refilled in one call.
+    """
+    if old_items == new_items:
+        return
+    old_set = set(old_items)
+    new_set = set(new_items)
+    deletions = missing_runs(old_items, new_set)
+    insertions = missing_runs(new_items, old_set)
+    same_order = [item for item in old_items if item in new_set] == [item for item in new_items if item in old_set]
+
+    if not same_order or len(deletions) + len(insertions) > MAX_LISTBOX_EDITS:
+        listbox.delete(0, tk.END)
+        listbox.insert(tk.END, *new_items)
+        return
+
+    # Delete from the end so the earlier indices stay valid, then insert front to back
+    for start, end in reversed(deletions):
+        listbox.delete(start, end - 1)
+    for start, end in insertions:
+        listbox.insert(start, *new_items[start:end])
+
+
+class WindowedListbox(tk.Listbox):
+    """A Listbox holding any number of items that renders them a page at a time, loading more as it is scrolled."""
+
+    def __init__(self, master, page_size=LISTBOX_PAGE_SIZE, **kwargs):
+        self.scroll_command = kwargs.pop('yscrollcommand', None)
+        super().__init__(master, yscrollcommand=self.on_scroll, **kwargs)
+        self.page_size = page_size
+        self.items = []
+        self.rendered_items = []
+        self.render_pending = False
+        self.dimmed = []
+        self.dim_color = None
+        self.keys = None
+
+    def set_items(self, items, dimmed=(), keys=None):
+        """Shows items, keeping at least as many rows rendered as before so the view does not jump.
+
+        The items at the dimmed indexes are greyed out. keys can identify the rows apart from
+        their texts: when they are the same as before, only the texts that changed (such as
+        counts shown in them) are replaced and the view stays in place.
+        """
+        rendered_items = items[:max(self.page_size, len(self.rendered_items))]
+        dimmed = sorted(dimmed)
+        same_rows = keys is not None and keys == self.keys and len(rendered_items) == len(self.rendered_items)
+        self.keys = keys
+        if same_rows:
+            self.replace_rows(rendered_items, dimmed)
+        else:
+            sync_listbox(self, self.rendered_items, rendered_items)
+            self.dimmed = dimmed
+            self.dim_rows(0, len(rendered_items))
+        self.items = items
+        self.rendered_items = rendered_items
+
+    def replace_rows(self, rendered_items, dimmed):
+        """Replaces the rendered rows whose text changed and restyles those whose dimming changed."""
+        view = self.yview()[0]
+        changed = [index for index, (old, new) in enumerate(zip(self.rendered_items, rendered_items)) if old != new]
+        if len(changed) > MAX_LISTBOX_EDITS:
+            self.delete(0, tk.END)
+            self.insert(tk.END, *rendered_items)
+            self.dimmed = dimmed
+            self.dim_rows(0, len(rendered_items))
+            self.yview_moveto(view)
+            return
+        for index in changed:
+            self.delete(index)
+            self.insert(index, rendered_items[index])
+        old_dimmed = set(self.dimmed)
+        new_dimmed = set(dimmed)
+        self.dimmed = dimmed
+        if self.dim_color is not None:
+            # Replaced rows come back undimmed; kept rows only need a change of dimming
+            replaced = set(changed)
+            for index in (replaced & new_dimmed) | ((old_dimmed ^ new_dimmed) - replaced):
+                if index < len(rendered_items):
+                    self.itemconfig(index, fg=self.dim_color if index in new_dimmed else "")
+        if changed:
+            self.yview_moveto(view)
+
+    def ensure_rendered(self, count):
+        """Renders the first count items (or all of them if there are fewer)."""
+        if count > len(self.rendered_items):
+            more_items = self.items[len(self.rendered_items):count]
+            if more_items:
+                start = len(self.rendered_items)
+                self.insert(tk.END, *more_items)
+                self.rendered_items = self.rendered_items + more_items
+                self.dim_rows(start, len(self.rendered_items))
+
+    def set_dim_color(self, color):
+        self.dim_color = color
+        self.dim_rows(0, len(self.rendered_items))
+
+    def dim_rows(self, start, end):
+        """Greys out the dimmed items among the rendered rows start to end."""
+        if self.dim_color is None:
+            return
+        for index in self.dimmed[bisect_left(self.dimmed, start):bisect_left(self.dimmed, end)]:
+            self.itemconfig(index, fg=self.dim_color)
+
+    def render_more(self):
+        self.render_pending = False
+        self.ensure_rendered(len(self.rendered_items) + self.page_size)
+
+    def on_scroll(self, first, last):
+        """Renders the next page once the view nears the end of the rendered rows."""
+        if float(last) >= LISTBOX_LOAD_MORE_FRACTION and len(self.rendered_items) < len(self.items) and not self.render_pending:
+            self.render_pending = True
+            self.after_idle(self.render_more)
+        if self.scroll_command:
+            self.scroll_command(first, last)
+
+
 class KanjiSearchApp:
-    def __init__(self, master, data_file, kanjidic_file):
+    def __init__(self, master, data_file, kanjidic_file, profiler=None, use_cache=True):
         self.master = master
         master.title("Fast Kanji — stormoid")
         master.geometry("900x850")
@@ -40,24 +213,63 @@ class KanjiSearchApp:
         # --- Styling ---
         self.setup_styles()
 
-        # Load Kanji data
-        self.kanji_data = self.load_kanji_data(data_file)
-
-        # Load Kanjidic2 data
-        self.kanjidic_data = self.load_kanjidic_data(kanjidic_file)
+        # Stage timings (a disabled profiler unless --profile is given)
+        self.profiler = profiler or Profiler()
+        self.search_started = None
+        self.profile_overlay = None
+        self.profile_overlay_after_id = None
+
+        # Data loading and queries run on a worker thread; results come back through poll_tasks
+        self.executor = ThreadPoolExecutor(max_workers=1)
+        self.pending_tasks = []
+        self.latest_tasks = {}
+        self.poll_after_id = None
+        self.engine = None
+        # Query results kept across sessions, only used on the worker thread (None when disabled)
+        self.query_cache = None
+
+        # kanji -> (KanjiDetails or None, display text), filled on selection and prefetched in the background
+        self.details_cache = LRUCache(DETAILS_CACHE_SIZE)
+        self.displayed_kanji = None
+        self.displayed_details = None
 
         # Store selected components
         self.selected_components = set()
+
+        # Search state reused between keystrokes
+        self.search_after_id = None
+        self.input_lines = []
+        self.line_token_ranges = {}
+        self.latest_matches = []
+        self.matching_components = {}
+        # Kanji left by adding each listed component to the selection
+        self.component_counts = {}
+
+        # Text decomposition window, created on first use
+        self.decompose_window = None
+        self.decompose_blocks = []
+        self.decompose_after_id = None
         
         # Common Kanji Only Checkbox
         self.common_only = tk.BooleanVar(value=True)
 
+        # Result filters: (low, high) per attribute, blank for open, and the sort order
+        self.range_vars = {attribute: (tk.StringVar(), tk.StringVar()) for attribute, _, _ in RANGE_FILTERS}
+        self.sort_var = tk.StringVar(value=SORT_OPTIONS[0][0])
+
         # Create widgets (now called before set_theme_colors)
         self.create_widgets()
 
         # Apply initial theme (now called after creating widgets)
         self.set_theme_colors(self.current_theme)
 
+        if self.profiler.enabled:
+            self.master.bind("<F12>", self.toggle_profile_overlay)
+
+        # Load Kanji and Kanjidic2 data (from the binary bundle when it is up to date)
+        self.show_loading()
+        self.run_task("load", self.on_data_loaded, self.load_data, data_file, kanjidic_file, use_cache)
+
     def setup_styles(self):
         """Sets up the dark and light mode styles."""
 
@@ -72,6 +284,7 @@ class KanjiSearchApp:
         self.dark_listbox_fg = "#EAEAE5"
         self.dark_listbox_select_bg = "#444444"
         self.dark_listbox_select_fg = "#EAEAE5"
+        self.dark_listbox_dim_fg = "#77797B"
         self.dark_entry_bg = "#292B2D"
         self.dark_entry_fg = "#EAEAE5"
         self.dark_frame_bg = "#313335"
@@ -86,6 +299,7 @@ class KanjiSearchApp:
         self.light_listbox_fg = "#000000"
         self.light_listbox_select_bg = "#A59778"
         self.light_listbox_select_fg = "#000000"
+        self.light_listbox_dim_fg = "#7D6F55"
         self.light_entry_bg = "#C4B597"
         self.light_entry_fg = "#000000"
         self.light_frame_bg = "#D3C4A5"
@@ -109,6 +323,7 @@ class KanjiSearchApp:
             listbox_fg = self.dark_listbox_fg
             listbox_select_bg = self.dark_listbox_select_bg
             listbox_select_fg = self.dark_listbox_select_fg
+            listbox_dim_fg = self.dark_listbox_dim_fg
             entry_bg = self.dark_entry_bg
             entry_fg = self.dark_entry_fg
             frame_bg = self.dark_frame_bg
@@ -123,6 +338,7 @@ class KanjiSearchApp:
             listbox_fg = self.light_listbox_fg
             listbox_select_bg = self.light_listbox_select_bg
             listbox_select_fg = self.light_listbox_select_fg
+            listbox_dim_fg = self.light_listbox_dim_fg
             entry_bg = self.light_entry_bg
             entry_fg = self.light_entry_fg
             frame_bg = self.light_frame_bg
@@ -151,8 +367,13 @@ class KanjiSearchApp:
         self.master.configure(bg=bg_color)
         self.input_text.configure(bg=entry_bg, fg=entry_fg, insertbackground=entry_insert_bg, relief="flat")
         self.components_listbox.configure(bg=listbox_bg, fg=listbox_fg, selectbackground=listbox_select_bg, selectforeground=listbox_select_fg, borderwidth=0, highlightthickness=0, relief="flat")
+        self.components_listbox.set_dim_color(listbox_dim_fg)
         self.results_listbox.configure(bg=listbox_bg, fg=listbox_fg, selectbackground=listbox_select_bg, selectforeground=listbox_select_fg, borderwidth=0, highlightthickness=0, relief="flat")
         self.kanji_details_text.configure(bg=entry_bg, fg=entry_fg, insertbackground=entry_insert_bg, relief="flat")
+        if self.decompose_window is not None:
+            self.decompose_window.configure(bg=bg_color)
+            for text_widget in (self.decompose_input_text, self.decompose_output_text):
+                text_widget.configure(bg=entry_bg, fg=entry_fg, insertbackground=entry_insert_bg, relief="flat")
     
     def toggle_theme(self):
         """Toggles between dark and light themes."""
@@ -171,7 +392,7 @@ class KanjiSearchApp:
 
         self.input_text = scrolledtext.ScrolledText(input_frame, wrap=tk.WORD, height=5, font=self.med_font)
         self.input_text.grid(row=0, column=0, padx=5, pady=5, sticky="nsew")
-        self.input_text.bind("<KeyRelease>", self.update_results)
+        self.input_text.bind("<KeyRelease>", self.schedule_update_results)
 
         # Checkboxes Frame (to hold both checkboxes)
         checkboxes_frame = ttk.Frame(input_frame)
@@ -181,10 +402,31 @@ class KanjiSearchApp:
         common_checkbox = ttk.Checkbutton(checkboxes_frame, text="Common Kanjis Only (2500)", variable=self.common_only, command=self.update_kanji_results)
         common_checkbox.pack(side="left", padx=(0, 10))
 
+        # Decompose Text Button
+        decompose_button = ttk.Button(checkboxes_frame, text="Decompose Text...", command=self.open_decompose_window)
+        decompose_button.pack(side="left", padx=(10, 0))
+
         # Theme Toggle Checkbox
         self.theme_toggle_checkbox = ttk.Checkbutton(checkboxes_frame, text="Light Mode", command=self.toggle_theme)
         self.theme_toggle_checkbox.pack(side="right", padx=(10, 0))
 
+        # Filters Frame (attribute ranges and sort order of the results)
+        filters_frame = ttk.Frame(input_frame)
+        filters_frame.grid(row=2, column=0, padx=5, pady=(0, 5), sticky="ew")
+
+        for attribute, label, highest in RANGE_FILTERS:
+            ttk.Label(filters_frame, text=label).pack(side="left", padx=(0, 4))
+            low_var, high_var = self.range_vars[attribute]
+            for variable, padding in ((low_var, 0), (high_var, 14)):
+                spinbox = ttk.Spinbox(filters_frame, from_=1, to=highest, width=4, textvariable=variable, command=self.update_kanji_results)
+                spinbox.pack(side="left", padx=(0, padding))
+                spinbox.bind("<KeyRelease>", self.update_kanji_results)
+
+        sort_combobox = ttk.Combobox(filters_frame, textvariable=self.sort_var, values=[label for label, _, _ in SORT_OPTIONS], state="readonly", width=10)
+        sort_combobox.pack(side="right")
+        sort_combobox.bind("<<ComboboxSelected>>", self.update_kanji_results)
+        ttk.Label(filters_frame, text="Sort").pack(side="right", padx=(0, 4))
+
         # Matching Components and Kanji Frame
         components_kanji_frame = ttk.Frame(self.master)
         components_kanji_frame.grid(row=1, column=0, padx=10, pady=10, sticky="nsew")
@@ -193,15 +435,15 @@ class KanjiSearchApp:
         self.components_frame = ttk.LabelFrame(components_kanji_frame, text="Matching Components")
         self.components_frame.grid(row=0, column=0, padx=(0, 10), pady=0, sticky="nsew")
 
-        self.components_listbox = tk.Listbox(self.components_frame, selectmode=tk.MULTIPLE, exportselection=False, font=self.large_font)
+        self.components_listbox = WindowedListbox(self.components_frame, selectmode=tk.MULTIPLE, exportselection=False, font=self.large_font)
         self.components_listbox.grid(row=0, column=0, padx=5, pady=5, sticky="nsew")
         self.components_listbox.bind("<<ListboxSelect>>", self.on_component_select)
 
         # Results Frame (Matching Kanji)
-        results_frame = ttk.LabelFrame(components_kanji_frame, text="Matching Kanji")
-        results_frame.grid(row=0, column=1, padx=(10, 0), pady=0, sticky="nsew")
+        self.results_frame = ttk.LabelFrame(components_kanji_frame, text="Matching Kanji")
+        self.results_frame.grid(row=0, column=1, padx=(10, 0), pady=0, sticky="nsew")
 
-        self.results_listbox = tk.Listbox(results_frame, exportselection=False, font=self.large_font)
+        self.results_listbox = WindowedListbox(self.results_frame, exportselection=False, font=self.large_font)
         self.results_listbox.grid(row=0, column=0, padx=5, pady=5, sticky="nsew")
         self.results_listbox.bind("<<ListboxSelect>>", self.on_kanji_select)
 
@@ -212,6 +454,12 @@ class KanjiSearchApp:
         self.kanji_details_text = scrolledtext.ScrolledText(kanji_details_frame, wrap=tk.WORD, height=12, state="disabled", font=self.large_font)
         self.kanji_details_text.grid(row=0, column=0, padx=5, pady=5, sticky="nsew")
 
+        # Link tags are set up once; they open the links of whichever Kanji is displayed
+        self.kanji_details_text.tag_config("jisho_link", foreground="#079EAA", underline=0)
+        self.kanji_details_text.tag_bind("jisho_link", "<Button-1>", lambda e: self.open_url(self.displayed_details.jisho_url))
+        self.kanji_details_text.tag_config("kanshudo_link", foreground="#079EAA", underline=0)
+        self.kanji_details_text.tag_bind("kanshudo_link", "<Button-1>", lambda e: self.open_url(self.displayed_details.kanshudo_url))
+
         # Configure grid resizing
         self.master.rowconfigure(1, weight=1)
         self.master.columnconfigure(0, weight=1)
@@ -223,72 +471,201 @@ class KanjiSearchApp:
         components_kanji_frame.columnconfigure(1, weight=1)
         self.components_frame.rowconfigure(0, weight=1)
         self.components_frame.columnconfigure(0, weight=1)
-        results_frame.rowconfigure(0, weight=1)
-        results_frame.columnconfigure(0, weight=1)
+        self.results_frame.rowconfigure(0, weight=1)
+        self.results_frame.columnconfigure(0, weight=1)
         kanji_details_frame.rowconfigure(0, weight=1)
         kanji_details_frame.columnconfigure(0, weight=1)
         
-    def resource_path(self, relative_path):
-        """ Get absolute path to resource, works for dev and for PyInstaller """
-        try:
-            # PyInstaller creates a temp folder and stores path in _MEIPASS
-            base_path = sys._MEIPASS
-        except Exception:
-            base_path = os.path.abspath("./data")
-
-        return os.path.join(base_path, relative_path)
-
-    def load_kanji_data(self, data_file):
-        """Loads the Kanji data from the JSON file."""
-        data_file_path = self.resource_path(data_file)
-        try:
-            with open(data_file_path, 'r', encoding='utf-8') as f:
-                return json.load(f)
-        except FileNotFoundError:
-            print(f"Error: File '{data_file_path}' not found.")
-            return {}
-        except json.JSONDecodeError:
-            print(f"Error: Invalid JSON format in '{data_file_path}'.")
-            return {}
-
-    def load_kanjidic_data(self, kanjidic_file):
-        """Loads the Kanjidic2 data from the JSON file."""
-        kanjidic_file_path = self.resource_path(kanjidic_file)
-        try:
-            with open(kanjidic_file_path, 'r', encoding='utf-8') as f:
-                return json.load(f)
-        except FileNotFoundError:
-            print(f"Error: File '{kanjidic_file_path}' not found.")
-            return {}
-        except json.JSONDecodeError:
-            print(f"Error: Invalid JSON format in '{kanjidic_file_path}'.")
-            return {}
+    def run_task(self, kind, on_done, task, *args):
+        """Runs task(*args) on the worker thread and passes its result to on_done on the Tk thread.
+
+        A newer task of the same kind supersedes the previous one: it is cancelled if it has not
+        started yet, and its result is dropped otherwise. on_done can be None for tasks run only
+        for their side effects.
+        """
+        self.cancel_task(kind)
+        future = self.executor.submit(task, *args)
+        self.latest_tasks[kind] = future
+        self.pending_tasks.append((kind, future, on_done))
+        if self.poll_after_id is None:
+            self.poll_after_id = self.master.after(TASK_POLL_MS, self.poll_tasks)
+
+    def cancel_task(self, kind):
+        """Cancels the latest task of a kind, if any."""
+        future = self.latest_tasks.pop(kind, None)
+        if future is not None:
+            future.cancel()
+
+    def poll_tasks(self):
+        """Delivers the results of finished background tasks on the Tk thread."""
+        self.poll_after_id = None
+        tasks, self.pending_tasks = self.pending_tasks, []
+        for kind, future, on_done in tasks:
+            if not future.done():
+                self.pending_tasks.append((kind, future, on_done))
+            elif self.latest_tasks.get(kind) is future:
+                del self.latest_tasks[kind]
+                # A failing task or callback must not keep the other results from being delivered
+                try:
+                    result = future.result()
+                    if on_done is not None:
+                        on_done(result)
+                except Exception as e:
+                    self.on_task_failed(kind, e)
+        if self.pending_tasks and self.poll_after_id is None:
+            self.poll_after_id = self.master.after(TASK_POLL_MS, self.poll_tasks)
+
+    def on_task_failed(self, kind, error):
+        """Reports a background task that raised, showing load failures in the details pane."""
+        print(f"Error: The {kind} task failed: {error!r}")
+        if kind == "load":
+            self.kanji_details_text.config(state="normal")
+            self.kanji_details_text.delete("1.0", tk.END)
+            self.kanji_details_text.insert(tk.END, f"Could not load the Kanji data:\n{error}")
+            self.kanji_details_text.config(state="disabled")
+
+    def show_loading(self):
+        """Shows the loading state until the data is ready."""
+        self.input_text.config(state="disabled")
+        self.kanji_details_text.config(state="normal")
+        self.kanji_details_text.insert(tk.END, "Loading Kanji data...")
+        self.kanji_details_text.config(state="disabled")
+
+    def load_data(self, data_file, kanjidic_file, use_cache):
+        """Loads the engine and opens the query cache for its data (on the worker thread)."""
+        engine = KanjiEngine.load(data_file, kanjidic_file)
+        if use_cache:
+            with self.profiler.stage("cache open"):
+                self.query_cache = QueryCache.open(engine.data.digest)
+        return engine
+
+    def close(self):
+        """Writes out the query cache and stops the worker thread."""
+        for future in self.latest_tasks.values():
+            future.cancel()
+        # Queued behind a load that is still running, which may yet open the cache
+        self.executor.submit(self.close_query_cache)
+        self.executor.shutdown()
+
+    def close_query_cache(self):
+        """Flushes and closes the query cache, if it was opened (on the worker thread)."""
+        if self.query_cache is not None:
+            self.query_cache.close()
+            self.query_cache = None
+
+    def on_data_loaded(self, engine):
+        """Enables searching once the data is loaded."""
+        self.engine = engine
+        self.kanji_details_text.config(state="normal")
+        self.kanji_details_text.delete("1.0", tk.END)
+        self.kanji_details_text.config(state="disabled")
+        self.input_text.config(state="normal")
+        self.input_text.focus_set()
+
+    def schedule_update_results(self, event=None):
+        """Debounces keystrokes: the search runs once typing pauses, replacing any pending one."""
+        if self.search_after_id is not None:
+            self.master.after_cancel(self.search_after_id)
+        self.search_after_id = self.master.after(SEARCH_DEBOUNCE_MS, self.update_results)
 
     def update_results(self, event=None):
         """Updates the results based on the input text."""
-        meanings = self.input_text.get("1.0", tk.END).strip().split('\n')
-        meanings = [m.strip() for m in meanings if m.strip()]
+        self.search_after_id = None
+        if self.engine is None:
+            return
+        start = self.profiler.now()
+        with self.profiler.stage("input read"):
+            meanings = self.input_text.get("1.0", tk.END).strip().split('\n')
+            meanings = [m.strip() for m in meanings if m.strip()]
+
+        # Keys that do not edit the text (arrows, modifiers...) leave nothing to redo
+        if meanings == self.input_lines:
+            return
+        self.input_lines = meanings
+        self.search_started = start
 
         if len("".join(meanings)) < 1:
-            self.components_listbox.delete(0, tk.END)
-            self.results_listbox.delete(0, tk.END)
+            self.cancel_task("components")
+            self.cancel_task("kanji")
+            self.line_token_ranges = {}
+            self.latest_matches = []
+            self.matching_components = {}
+            self.component_counts = {}
+            self.components_listbox.set_items([])
+            self.results_listbox.set_items([])
+            self.results_frame.config(text="Matching Kanji")
             self.kanji_details_text.config(state="normal")
             self.kanji_details_text.delete("1.0", tk.END)
             #self.kanji_details_text.insert(tk.END, "Enter a letter to search.\n")
             self.kanji_details_text.config(state="disabled")
+            self.displayed_kanji = None
             return
 
-        self.matching_components = self.find_matching_components(meanings)
-        self.update_component_listbox()
+        self.run_task("components", self.on_components_found, self.find_components, meanings, self.line_token_ranges)
+
+    def find_components(self, meanings, previous_ranges):
+        """Finds the matching components of the input lines (on the worker thread).
+
+        Lines that no meaning starts with fall back to the typo tolerant search. The matches are
+        ranked best first, then by stroke count.
+        """
+        with self.profiler.stage("component match"):
+            line_token_ranges = self.find_line_token_ranges(meanings, previous_ranges)
+            scores = {}
+            for meaning, (start, end) in line_token_ranges.items():
+                if start == end:
+                    line_scores = self.fuzzy_line_scores(meaning)
+                else:
+                    line_scores = self.engine.token_range_scores((start, end))
+                for row, score in line_scores.items():
+                    scores[row] = max(score, scores.get(row, 0.0))
+            return line_token_ranges, self.engine.ranked_components(scores)
+
+    def fuzzy_line_scores(self, meaning):
+        """Returns the typo tolerant component scores of an input line, from the query cache when possible."""
+        if self.query_cache is None:
+            return self.engine.component_meaning_scores(meaning)
+        cached = self.query_cache.get("meaning", meaning)
+        if cached is None:
+            line_scores = self.engine.component_meaning_scores(meaning)
+            self.query_cache.put("meaning", meaning, list(line_scores.items()))
+            return line_scores
+        return dict(cached)
+
+    def on_components_found(self, result):
+        """Passes the matching components of the latest search on to the Kanji search, which lists them with their counts."""
+        self.line_token_ranges, self.latest_matches = result
         self.update_kanji_results()
 
-    def update_component_listbox(self):
-        """Updates the listbox of matching components."""
-        self.components_listbox.delete(0, tk.END)
+    def find_line_token_ranges(self, meanings, previous_ranges):
+        """Returns the meaning token range of every input line, reusing the ranges of the previous search.
+
+        Unchanged lines keep their range, and a line extending a previous one only searches within its range.
+        """
+        line_token_ranges = {}
+        for meaning in meanings:
+            prefix = meaning.lower()
+            token_range = previous_ranges.get(prefix)
+            if token_range is None:
+                # Narrow from the longest previous line this one extends (usually its own previous value)
+                known_ranges = [(len(known), known_range) for known, known_range in previous_ranges.items() if prefix.startswith(known)]
+                bounds = max(known_ranges)[1] if known_ranges else (0, None)
+                token_range = self.engine.meaning_token_range(prefix, *bounds)
+            line_token_ranges[prefix] = token_range
+        return line_token_ranges
 
-        for component, details in self.matching_components.items():
-            if 'meaning' in details:
-                self.components_listbox.insert(tk.END, f"{component} ({details['meaning']})")
+    def update_component_listbox(self):
+        """Updates the listbox of matching components, greying out those that would leave no Kanji."""
+        items = []
+        dimmed = []
+        for index, (component, match) in enumerate(self.matching_components.items()):
+            count = self.component_counts.get(component, 0)
+            items.append(f"{component} ({match.meaning})  {count}")
+            if not count:
+                dimmed.append(index)
+        self.components_listbox.set_items(items, dimmed, list(self.matching_components))
+        # Rows whose count changed were replaced, losing their selection
+        self.keep_component_selection()
 
     def on_component_select(self, event=None):
         """Handles component selection from the listbox."""
@@ -306,157 +683,253 @@ class KanjiSearchApp:
         """Keeps the component selection active."""
         selected_indices = [list(self.matching_components.keys()).index(comp) for comp in self.selected_components if comp in self.matching_components]
         for index in selected_indices:
+            self.components_listbox.ensure_rendered(index + 1)
             self.components_listbox.selection_set(index)
 
-    def update_kanji_results(self):
+    def update_kanji_results(self, event=None):
         """Updates the Kanji results based on selected components."""
-        matching_kanji = self.find_kanji_with_all_components(self.selected_components)
-
-        self.results_listbox.delete(0, tk.END)
-        if matching_kanji:
-            for kanji in matching_kanji:
-                if self.common_only.get():
-                    if self.is_common_kanji(kanji):
-                        self.results_listbox.insert(tk.END, kanji)
-                else:
-                    self.results_listbox.insert(tk.END, kanji)
-        else:
-            self.results_listbox.insert(tk.END, "No matching Kanji")
-
-    def is_common_kanji(self, kanji):
-        """Checks if a Kanji is considered common based on the presence of a frequency value in Kanjidic2."""
-        kanji_entry = self.find_kanji_in_kanjidic(kanji)
-        if kanji_entry:
-            return kanji_entry.get('freq') is not None
-        return False
-
-    def find_kanji_in_kanjidic(self, kanji):
-        """Finds the Kanji entry in the loaded Kanjidic data."""
-        for entry in self.kanjidic_data:
-            if entry.get('literal') == kanji:
-                return entry
-        return None
-
-    def find_matching_components(self, meanings):
-        """Finds components that have any of the specified meanings at the beginning of the word."""
-        matching_components = {}
-        for component, details in self.kanji_data.items():
-            if 'meaning' in details:
-                component_meanings = [m.strip() for m in details['meaning'].split(',')]
-                if any(component_meaning.lower().startswith(meaning.lower()) for meaning in meanings for component_meaning in component_meanings):
-                    matching_components[component] = details
-        return matching_components
-
-    def find_kanji_with_all_components(self, selected_components):
-        """Finds Kanji that contain all the specified components."""
-        if not selected_components:
-            return []
-
-        kanji_lists = [self.kanji_data[component]['kanji'] for component in selected_components if component in self.kanji_data]
-
-        if kanji_lists:
-            common_kanji = set(kanji_lists[0])
-            for kanji_list in kanji_lists[1:]:
-                common_kanji.intersection_update(kanji_list)
-            return list(common_kanji)
-        else:
-            return []
+        if self.engine is None:
+            return
+        if self.search_started is None:
+            self.search_started = self.profiler.now()
+        _, sort_by, descending = next(option for option in SORT_OPTIONS if option[0] == self.sort_var.get())
+        self.run_task("kanji", self.on_kanji_found, self.find_kanji, frozenset(self.selected_components), self.common_only.get(),
+                      self.latest_matches, self.range_filters(), sort_by, descending)
+
+    def range_filters(self):
+        """Returns the attribute ranges entered in the filter boxes, ignoring blank or invalid bounds."""
+        ranges = {}
+        for attribute, variables in self.range_vars.items():
+            # isdecimal() rules out digits such as "²" that int() does not accept
+            bounds = tuple(int(variable.get()) if variable.get().strip().isdecimal() else None for variable in variables)
+            if bounds != (None, None):
+                ranges[attribute] = bounds
+        return ranges
+
+    def find_kanji(self, selected_components, common_only, matches, ranges, sort_by, descending):
+        """Finds the Kanji containing all the selected components, and the counts of the matching components (on the worker thread)."""
+        with self.profiler.stage("component counts"):
+            counts = self.engine.next_component_counts(selected_components, [match.component for match in matches], common_only, ranges)
+        if self.query_cache is None:
+            return matches, counts, self.search_kanji(selected_components, common_only, ranges, sort_by, descending)
+        key = json.dumps([sorted(selected_components), common_only, sorted(ranges.items()), sort_by, descending], ensure_ascii=False)
+        kanji = self.query_cache.get("kanji", key)
+        if kanji is None:
+            kanji = self.search_kanji(selected_components, common_only, ranges, sort_by, descending)
+            self.query_cache.put("kanji", key, kanji)
+        return matches, counts, kanji
+
+    def search_kanji(self, selected_components, common_only, ranges, sort_by, descending):
+        """Returns the Kanji containing all the selected components, filtered and sorted."""
+        with self.profiler.stage("intersection"):
+            bitmap = self.engine.find_kanji_bitmap(selected_components)
+        if common_only:
+            with self.profiler.stage("common filter"):
+                bitmap = self.engine.filter_common(bitmap)
+        if ranges:
+            with self.profiler.stage("range filter"):
+                bitmap = self.engine.filter_ranges(bitmap, ranges)
+        with self.profiler.stage("result decode"):
+            return self.engine.sorted_kanji(bitmap, sort_by, descending)
+
+    def on_kanji_found(self, result):
+        """Shows the matching components and Kanji of the latest search."""
+        matches, self.component_counts, matching_kanji = result
+        self.matching_components = {match.component: match for match in matches}
+        with self.profiler.stage("listbox fill"):
+            self.update_component_listbox()
+            self.results_listbox.set_items(matching_kanji or ["No matching Kanji"])
+            # Only part of a long result list is rendered, so show the total in the frame title
+            self.results_frame.config(text=f"Matching Kanji ({len(matching_kanji)})")
+        self.profiler.record("search total", self.search_started)
+        self.search_started = None
+        self.prefetch_details(matching_kanji[:DETAILS_PREFETCH_COUNT])
 
     def on_kanji_select(self, event=None):
         """Handles Kanji selection from the listbox."""
         selected_index = self.results_listbox.curselection()
         if selected_index:
-            selected_kanji = self.results_listbox.get(selected_index[0])
+            index = selected_index[0]
+            selected_kanji = self.results_listbox.get(index)
             self.display_kanji_details(selected_kanji)
+            # Arrow keys browse on from the selection in either direction
+            items = self.results_listbox.items
+            self.prefetch_details(items[max(0, index - DETAILS_PREFETCH_COUNT // 2):index + DETAILS_PREFETCH_COUNT])
+
+    def rendered_details(self, kanji):
+        """Returns the KanjiDetails of a Kanji (None if not in Kanjidic2) and their display text, through the cache."""
+        rendered = self.details_cache.get(kanji)
+        if rendered is None:
+            kanji_details = self.engine.kanji_details(kanji)
+            rendered = (kanji_details, kanji_details.format_details() if kanji_details else "")
+            self.details_cache.put(kanji, rendered)
+        return rendered
+
+    def prefetch_details(self, kanji_list):
+        """Renders the details of the given Kanji into the cache on the worker thread."""
+        missing = [kanji for kanji in kanji_list if kanji not in self.details_cache]
+        if missing:
+            self.run_task("prefetch", None, self.render_details, missing)
+
+    def render_details(self, kanji_list):
+        for kanji in kanji_list:
+            self.rendered_details(kanji)
 
     def display_kanji_details(self, kanji):
         """Displays the details of the selected Kanji."""
-        kanji_entry = self.find_kanji_in_kanjidic(kanji)
-        if kanji_entry:
-            self.kanji_details_text.config(state="normal")
-            self.kanji_details_text.delete("1.0", tk.END)
+        if kanji == self.displayed_kanji:
+            return
+        kanji_details, details_text = self.rendered_details(kanji)
+        self.displayed_kanji = kanji
+        self.displayed_details = kanji_details
+
+        self.kanji_details_text.config(state="normal")
+        self.kanji_details_text.delete("1.0", tk.END)
+        if kanji_details:
+            # The literal, the Jisho and Kanshudo links and the details, in one insert
+            self.kanji_details_text.insert(tk.END, f"{kanji_details.literal} | ", (), "Jisho", "jisho_link", " — ", (),
+                                           "Kanshudo", "kanshudo_link", "\n" + details_text)
+        else:
+            self.kanji_details_text.insert(tk.END, "Kanji details not found in Kanjidic2.")
+        self.kanji_details_text.config(state="disabled")
 
-            literal = kanji_entry.get('literal', '')
-            jisho_url = f"https://jisho.org/search/{literal}%20%23kanji"
-            kanshudo_url = f"https://www.kanshudo.com/kanji/{literal}"
+    def open_url(self, url):
+        """Opens the given URL in the default web browser."""
+        webbrowser.open_new(url)
 
-            # Insert the literal first
-            self.kanji_details_text.insert(tk.END, f"{literal} | ")
+    def open_decompose_window(self):
+        """Opens the window that breaks pasted Japanese text down into components."""
+        if self.decompose_window is not None:
+            self.decompose_window.lift()
+            return
 
-            # Add Jisho link
-            self.kanji_details_text.insert(tk.END, "Jisho", "jisho_link")
-            self.kanji_details_text.tag_config("jisho_link", foreground="#079EAA", underline=0)
-            self.kanji_details_text.tag_bind("jisho_link", "<Button-1>", lambda e, url=jisho_url: self.open_url(url))
+        self.decompose_window = tk.Toplevel(self.master)
+        self.decompose_window.title("Decompose Text")
+        self.decompose_window.geometry("700x750")
+        self.decompose_window.protocol("WM_DELETE_WINDOW", self.close_decompose_window)
 
-            # Add separator
-            self.kanji_details_text.insert(tk.END, " — ")
+        # Input Frame
+        decompose_input_frame = ttk.LabelFrame(self.decompose_window, text="Paste Japanese Text")
+        decompose_input_frame.grid(row=0, column=0, padx=10, pady=10, sticky="nsew")
 
-            # Add Kanshudo link
-            self.kanji_details_text.insert(tk.END, "Kanshudo", "kanshudo_link")
-            self.kanji_details_text.tag_config("kanshudo_link", foreground="#079EAA", underline=0)
-            self.kanji_details_text.tag_bind("kanshudo_link", "<Button-1>", lambda e, url=kanshudo_url: self.open_url(url))
+        self.decompose_input_text = scrolledtext.ScrolledText(decompose_input_frame, wrap=tk.WORD, height=6, font=self.med_font)
+        self.decompose_input_text.grid(row=0, column=0, padx=5, pady=5, sticky="nsew")
 
-            # Add a newline for better formatting
-            self.kanji_details_text.insert(tk.END, "\n")
+        decompose_button = ttk.Button(decompose_input_frame, text="Decompose", command=self.decompose_input)
+        decompose_button.grid(row=1, column=0, padx=5, pady=5, sticky="w")
 
-            # Now add the rest of the details
-            details = self.extract_kanji_details(kanji_entry)
-            self.kanji_details_text.insert(tk.END, details)
+        # Breakdown Frame
+        self.decompose_output_frame = ttk.LabelFrame(self.decompose_window, text="Breakdown")
+        self.decompose_output_frame.grid(row=1, column=0, padx=10, pady=10, sticky="nsew")
 
-            self.kanji_details_text.config(state="disabled")
-        else:
-            self.kanji_details_text.config(state="normal")
-            self.kanji_details_text.delete("1.0", tk.END)
-            self.kanji_details_text.insert(tk.END, "Kanji details not found in Kanjidic2.")
-            self.kanji_details_text.config(state="disabled")
+        self.decompose_output_text = scrolledtext.ScrolledText(self.decompose_output_frame, wrap=tk.WORD, state="disabled", font=self.med_font)
+        self.decompose_output_text.grid(row=0, column=0, padx=5, pady=5, sticky="nsew")
 
+        # Configure grid resizing
+        self.decompose_window.rowconfigure(1, weight=1)
+        self.decompose_window.columnconfigure(0, weight=1)
+        decompose_input_frame.columnconfigure(0, weight=1)
+        self.decompose_output_frame.rowconfigure(0, weight=1)
+        self.decompose_output_frame.columnconfigure(0, weight=1)
 
-    def extract_kanji_details(self, kanji_entry):
-        """Extracts details from a Kanjidic2 character entry (JSON format)."""
-        literal = kanji_entry.get('literal', '')
-        details = ""
-
-        # Meanings
-        meanings = kanji_entry.get('reading_meaning', {}).get('meaning', [])
-        if meanings:
-            details += "Meanings: " + ", ".join(meanings) + "\n"
-
-        # Readings
-        readings_on = [r['value'] for r in kanji_entry.get('reading_meaning', {}).get('reading', []) if r['r_type'] == 'ja_on']
-        readings_kun = [r['value'] for r in kanji_entry.get('reading_meaning', {}).get('reading', []) if r['r_type'] == 'ja_kun']
-
-        if readings_on or readings_kun:
-            details += "\nReadings:\n"
-            if readings_on:
-                details += "On: " + "  or  ".join(readings_on) + "\n"
-            if readings_kun:
-                details += "Kun: " + "  or  ".join(readings_kun) + "\n"
-
-        grade = kanji_entry.get('grade')
-        stroke_count = kanji_entry.get('stroke_count')
-        freq = kanji_entry.get('freq')
-        jlpt = kanji_entry.get('jlpt')
-
-        details += "\n"
-        if grade:
-            details += f"Grade: {grade}\n"
-        if stroke_count:
-            details += f"Stroke Count: {stroke_count}\n"
-        if freq:
-            details += f"Frequency: {freq}\n"
-        if jlpt:
-            details += f"JLPT Level: {jlpt}\n"
-
-        return details
+        self.set_theme_colors(self.current_theme)
+        self.decompose_input_text.focus_set()
+
+    def close_decompose_window(self):
+        """Closes the decompose window, dropping any breakdown still running or being shown."""
+        self.cancel_task("decompose")
+        if self.decompose_after_id is not None:
+            self.master.after_cancel(self.decompose_after_id)
+            self.decompose_after_id = None
+        self.decompose_window.destroy()
+        self.decompose_window = None
+
+    def decompose_input(self):
+        """Starts the breakdown of the pasted text."""
+        if self.engine is None:
+            return
+        self.run_task("decompose", self.on_text_decomposed, self.format_text_breakdown,
+                      self.decompose_input_text.get("1.0", tk.END))
+
+    def format_text_breakdown(self, text):
+        """Formats the breakdown of every distinct Kanji of a text, in order of appearance (on the worker thread)."""
+        blocks = {}
+        for breakdown in self.engine.decompose_text(text):
+            if breakdown.literal not in blocks:
+                blocks[breakdown.literal] = breakdown.format_breakdown()
+        return list(blocks.values())
+
+    def on_text_decomposed(self, blocks):
+        """Streams the breakdown into the output, a chunk per event loop turn so large texts stay responsive."""
+        if self.decompose_window is None:
+            return
+        if self.decompose_after_id is not None:
+            self.master.after_cancel(self.decompose_after_id)
+            self.decompose_after_id = None
+        self.decompose_output_frame.config(text=f"Breakdown ({len(blocks)} Kanji)")
+        self.decompose_output_text.config(state="normal")
+        self.decompose_output_text.delete("1.0", tk.END)
+        self.decompose_output_text.config(state="disabled")
+        self.decompose_blocks = blocks
+        self.insert_breakdown_chunk(0)
+
+    def insert_breakdown_chunk(self, start):
+        self.decompose_after_id = None
+        end = start + DECOMPOSE_CHUNK_SIZE
+        self.decompose_output_text.config(state="normal")
+        self.decompose_output_text.insert(tk.END, "\n".join(self.decompose_blocks[start:end]) + "\n")
+        self.decompose_output_text.config(state="disabled")
+        if end < len(self.decompose_blocks):
+            self.decompose_after_id = self.master.after(1, self.insert_breakdown_chunk, end)
+
+    def toggle_profile_overlay(self, event=None):
+        """Shows or hides the window with the live stage timings."""
+        if self.profile_overlay is not None:
+            if self.profile_overlay_after_id is not None:
+                self.master.after_cancel(self.profile_overlay_after_id)
+                self.profile_overlay_after_id = None
+            self.profile_overlay.destroy()
+            self.profile_overlay = None
+            return
 
-    def open_url(self, url):
-        """Opens the given URL in the default web browser."""
-        webbrowser.open_new(url)
+        self.profile_overlay = tk.Toplevel(self.master)
+        self.profile_overlay.title("Fast Kanji — timings")
+        self.profile_overlay.protocol("WM_DELETE_WINDOW", self.toggle_profile_overlay)
+        label = tk.Label(self.profile_overlay, font=("Courier", 11), justify="left", anchor="nw")
+        label.pack(fill="both", expand=True, padx=10, pady=10)
+        buttons_frame = ttk.Frame(self.profile_overlay)
+        buttons_frame.pack(fill="x", padx=10, pady=(0, 10))
+        ttk.Button(buttons_frame, text="Dump", command=self.dump_profile).pack(side="left")
+        ttk.Button(buttons_frame, text="Reset", command=self.profiler.reset).pack(side="left", padx=(10, 0))
+        self.refresh_profile_overlay(label)
+
+    def refresh_profile_overlay(self, label):
+        self.profile_overlay_after_id = None
+        # The label also goes away when the main window is destroyed
+        if self.profile_overlay is None or not label.winfo_exists():
+            return
+        label.config(text=self.profiler.format_summary())
+        self.profile_overlay_after_id = self.master.after(PROFILE_OVERLAY_REFRESH_MS, self.refresh_profile_overlay, label)
+
+    def dump_profile(self):
+        """Writes the stage timings as JSON and as a Chrome trace."""
+        self.profiler.dump_json(PROFILE_FILE)
+        self.profiler.dump_chrome_trace(TRACE_FILE)
+        print(f"Wrote stage timings to '{PROFILE_FILE}' and '{TRACE_FILE}'.")
 
 def main():
+    parser = argparse.ArgumentParser(description="Search for Kanji by the meanings of their components.")
+    parser.add_argument('--profile', action='store_true',
+                        help=f"time each search stage; F12 shows the timings, which are written to {PROFILE_FILE} and {TRACE_FILE} on exit")
+    parser.add_argument('--no-cache', action='store_true', help="do not read or write the query cache in the user cache directory")
+    args = parser.parse_args()
+
     root = tk.Tk()
-    app = KanjiSearchApp(root, "fullcomps.json", "kanjidic2_stripped.json")
+    app = KanjiSearchApp(root, "fullcomps.json", "kanjidic2_stripped.json", Profiler(enabled=args.profile), not args.no_cache)
     root.mainloop()
+    app.close()
+    if args.profile:
+        app.dump_profile()
 
 if __name__ == "__main__":
     main()
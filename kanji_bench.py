@@ -0,0 +1,247 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+# Copyright 2025 stormoid
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Benchmark suite for the Fast Kanji search hot paths.
+
+Runs headless against the data in data/: replays typed keystroke sequences through the
+component search, runs component selections (including the worst cases 一, 口 and 亅)
+through the Kanji intersection, common filter and detail lookup, and times both data load
+paths. Latency percentiles, peak memory and startup times are written to a JSON file:
+
+    python kanji_bench.py --output bench_results.json
+    python kanji_bench.py --save-baseline bench_baseline.json
+    python kanji_bench.py --baseline bench_baseline.json    # exits with 1 on a regression
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+
+from kanji_data import BUNDLE_FILE, DATA_FILE, KANJI_ATTRIBUTES, KANJIDIC_FILE, KanjiData, build_bundle, resource_path, source_digest
+from kanji_engine import KanjiEngine
+
+RESULTS_VERSION = 1
+
+# Typed one character at a time; newlines start another meaning line as in the app
+KEYSTROKE_SEQUENCES = [
+    "tree",
+    "mouth\nperson",
+    "water\nsun\nlid",
+    "stroke\ns",
+    "grass\nheart\nhand",
+]
+
+# Component selections, worst cases (most Kanji) first
+COMPONENT_SELECTIONS = [
+    ("一",),
+    ("口",),
+    ("亅",),
+    ("口", "一"),
+    ("一", "｜", "口"),
+    ("木", "日"),
+    ("氵", "艹"),
+]
+
+# Attribute ranges and sort orders applied to every Kanji
+FILTER_QUERIES = [
+    ({'strokes': (5, 15), 'grade': (1, 6)}, 'strokes', True),
+    ({'jlpt': (3, 4)}, 'grade', False),
+    ({'freq': (None, 500)}, 'strokes', False),
+    ({}, 'jlpt', True),
+]
+
+# A result is a regression when it is slower than the baseline by this factor plus this many ms
+DEFAULT_TOLERANCE = 0.25
+DEFAULT_FLOOR_MS = 0.02
+
+
+def keystroke_states(sequence):
+    """Yields the meaning lines of the input after each keystroke of a sequence."""
+    for length in range(1, len(sequence) + 1):
+        meanings = [m.strip() for m in sequence[:length].split('\n') if m.strip()]
+        if meanings:
+            yield meanings
+
+
+def time_calls(function, argument_sets, rounds):
+    """Times function(*arguments) for every argument set, rounds times, returning the samples in seconds."""
+    samples = []
+    for _ in range(rounds):
+        for arguments in argument_sets:
+            start = time.perf_counter()
+            function(*arguments)
+            samples.append(time.perf_counter() - start)
+    return samples
+
+
+def summarize(samples):
+    """Returns the latency summary of timing samples, in milliseconds."""
+    ordered = sorted(samples)
+
+    def percentile(fraction):
+        return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))] * 1000
+
+    return {
+        'count': len(ordered),
+        'p50_ms': percentile(0.50),
+        'p99_ms': percentile(0.99),
+        'mean_ms': statistics.fmean(ordered) * 1000,
+        'max_ms': ordered[-1] * 1000,
+    }
+
+
+def bundle_path_for_benchmark(temp_dir, digest):
+    """Returns an up to date bundle to load, building a temporary one if needed."""
+    bundle_file_path = resource_path(BUNDLE_FILE)
+    if os.path.exists(bundle_file_path) and KanjiData.from_bundle(bundle_file_path, digest) is not None:
+        return bundle_file_path
+    return build_bundle(bundle_file=os.path.join(temp_dir, BUNDLE_FILE))
+
+
+def measure_startup(rounds):
+    """Times and measures the peak memory of both data load paths."""
+    data_file_path = resource_path(DATA_FILE)
+    kanjidic_file_path = resource_path(KANJIDIC_FILE)
+    startup = {}
+    memory = {}
+    with tempfile.TemporaryDirectory() as temp_dir:
+        bundle_file_path = bundle_path_for_benchmark(temp_dir, source_digest(data_file_path, kanjidic_file_path))
+        loaders = {
+            'load_json': lambda: KanjiData.from_json(data_file_path, kanjidic_file_path),
+            # Includes hashing the JSON files for the staleness check, as at app startup
+            'load_bundle': lambda: KanjiData.from_bundle(bundle_file_path, source_digest(data_file_path, kanjidic_file_path)),
+        }
+        for name, loader in loaders.items():
+            startup[name] = summarize(time_calls(loader, [()], rounds))
+
+            # Separate pass, since tracing slows the loaders down
+            tracemalloc.start()
+            loader()
+            memory[name + '_peak_mb'] = tracemalloc.get_traced_memory()[1] / 2 ** 20
+            tracemalloc.stop()
+    return startup, memory
+
+
+def run_benchmarks(rounds):
+    """Runs the query benchmarks against a freshly loaded engine."""
+    engine = KanjiEngine(KanjiData.from_json(resource_path(DATA_FILE), resource_path(KANJIDIC_FILE)))
+    selections = [(frozenset(selection),) for selection in COMPONENT_SELECTIONS]
+    keystrokes = [(meanings,) for sequence in KEYSTROKE_SEQUENCES for meanings in keystroke_states(sequence)]
+    worst_case_kanji = [(kanji,) for kanji in engine.find_kanji_with_all_components({"口"})]
+    all_kanji = (1 << len(engine.data.kanji_literals)) - 1
+    # The attribute indexes are built on first use; time the queries, not the build
+    for attribute in KANJI_ATTRIBUTES:
+        engine.data.attribute_index(attribute)
+
+    return {
+        'find_matching_components': summarize(time_calls(engine.find_matching_components, keystrokes, rounds)),
+        'rank_matching_components': summarize(time_calls(engine.rank_matching_components, keystrokes, rounds)),
+        'find_kanji_with_all_components': summarize(time_calls(
+            lambda selection: engine.find_kanji_with_all_components(selection), selections, rounds)),
+        'find_kanji_with_all_components[common]': summarize(time_calls(
+            lambda selection: engine.find_kanji_with_all_components(selection, True), selections, rounds)),
+        'count_kanji_with_all_components': summarize(time_calls(engine.count_kanji_with_all_components, selections, rounds)),
+        'next_component_counts': summarize(time_calls(engine.next_component_counts, selections, rounds)),
+        'filter_ranges+sorted_kanji[all]': summarize(time_calls(
+            lambda ranges, sort_by, descending: engine.sorted_kanji(engine.filter_ranges(all_kanji, ranges), sort_by, descending),
+            FILTER_QUERIES, rounds)),
+        'is_common_kanji': summarize(time_calls(engine.is_common_kanji, worst_case_kanji, rounds)),
+        'kanji_details': summarize(time_calls(engine.kanji_details, worst_case_kanji, max(1, rounds // 10))),
+    }
+
+
+def process_peak_rss_mb():
+    """Returns the peak resident set size of the process, where the platform reports it."""
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS bytes
+    return peak / 2 ** 20 if sys.platform == 'darwin' else peak / 2 ** 10
+
+
+def compare(results, baseline, tolerance, floor_ms):
+    """Returns a line for every latency that regressed against the baseline."""
+    regressions = []
+    # Tails are noisier than medians, and the few startup samples have no meaningful p99
+    checks = {'startup': {'p50_ms': tolerance}, 'benchmarks': {'p50_ms': tolerance, 'p99_ms': 2 * tolerance}}
+    for section, key_tolerances in checks.items():
+        for name, base in baseline.get(section, {}).items():
+            current = results[section].get(name)
+            if current is None:
+                continue
+            for key, key_tolerance in key_tolerances.items():
+                limit = base[key] * (1 + key_tolerance) + floor_ms
+                if current[key] > limit:
+                    regressions.append(f"{name} {key}: {current[key]:.4f} ms > {limit:.4f} ms (baseline {base[key]:.4f} ms)")
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the Fast Kanji search hot paths.")
+    parser.add_argument('--output', default="bench_results.json", help="results file (default: bench_results.json)")
+    parser.add_argument('--rounds', type=int, default=50, help="rounds over every benchmark input (default: 50)")
+    parser.add_argument('--startup-rounds', type=int, default=5, help="timed loads of each data path (default: 5)")
+    parser.add_argument('--baseline', help="compare against this results file and exit with 1 on a regression")
+    parser.add_argument('--save-baseline', help="also write the results to this baseline file")
+    parser.add_argument('--tolerance', type=float, default=DEFAULT_TOLERANCE,
+                        help=f"allowed relative slowdown against the baseline (default: {DEFAULT_TOLERANCE})")
+    args = parser.parse_args(argv)
+
+    startup, memory = measure_startup(args.startup_rounds)
+    benchmarks = run_benchmarks(args.rounds)
+    memory['process_peak_rss_mb'] = process_peak_rss_mb()
+    results = {
+        'version': RESULTS_VERSION,
+        'timestamp': time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'startup': startup,
+        'benchmarks': benchmarks,
+        'memory': memory,
+    }
+
+    for section in ('startup', 'benchmarks'):
+        for name, summary in results[section].items():
+            print(f"{name:42} p50 {summary['p50_ms']:9.4f} ms   p99 {summary['p99_ms']:9.4f} ms   ({summary['count']} samples)")
+    for name, value in memory.items():
+        if value is not None:
+            print(f"{name:42} {value:9.1f} MB")
+
+    for path in filter(None, (args.output, args.save_baseline)):
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(results, f, ensure_ascii=False, indent=2)
+
+    if args.baseline:
+        with open(args.baseline, 'r', encoding='utf-8') as f:
+            regressions = compare(results, json.load(f), args.tolerance, DEFAULT_FLOOR_MS)
+        for regression in regressions:
+            print("REGRESSION " + regression)
+        if regressions:
+            sys.exit(1)
+        print("No regressions against the baseline.")
+
+
+if __name__ == "__main__":
+    main()
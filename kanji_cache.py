@@ -0,0 +1,162 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+# Copyright 2025 stormoid
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Persistent query result cache for Fast Kanji.
+
+Results are stored as JSON in an SQLite database in the user cache directory, tagged with
+the digest of the data files they were computed from: when the data changes, the whole cache
+is dropped on open. The most recently used entries are read into memory when the cache is
+opened, writes are batched, and the least recently used entries are evicted beyond
+max_entries.
+
+A QueryCache is not thread-safe; the app only uses it from its worker thread.
+"""
+import json
+import os
+import sqlite3
+import sys
+
+from kanji_engine import LRUCache
+
+CACHE_FILE = "query_cache.sqlite3"
+# Bump when the format of the cached results changes
+CACHE_VERSION = 2
+DEFAULT_MAX_ENTRIES = 20000
+DEFAULT_WARM_ENTRIES = 1000
+# Pending writes are flushed to disk after this many
+FLUSH_EVERY = 64
+
+
+def user_cache_dir(app_name="fast_kanji"):
+    """Returns the per-user cache directory of the platform."""
+    if sys.platform == 'win32':
+        base = os.environ.get('LOCALAPPDATA') or os.path.expanduser(os.path.join("~", "AppData", "Local"))
+        return os.path.join(base, app_name, "Cache")
+    if sys.platform == 'darwin':
+        return os.path.join(os.path.expanduser("~/Library/Caches"), app_name)
+    return os.path.join(os.environ.get('XDG_CACHE_HOME') or os.path.expanduser("~/.cache"), app_name)
+
+
+class QueryCache:
+    """Query results by (kind, key), kept on disk across sessions for one version of the data."""
+
+    def __init__(self, connection, max_entries=DEFAULT_MAX_ENTRIES, warm_entries=DEFAULT_WARM_ENTRIES):
+        self.connection = connection
+        self.max_entries = max_entries
+        self.memory = LRUCache(max(warm_entries, 1))
+        # (kind, key) -> JSON value to write, or None to only record the use, least recently used first
+        self.pending = {}
+        # Entries are stamped with increasing use numbers rather than times, so that the order of
+        # the uses within a flush is kept
+        self.last_use = 0
+
+    @classmethod
+    def open(cls, digest, path=None, max_entries=DEFAULT_MAX_ENTRIES, warm_entries=DEFAULT_WARM_ENTRIES):
+        """Opens (or creates) the cache for the data with the given digest, or returns None if it cannot be used."""
+        if digest is None:
+            return None
+        if path is None:
+            path = os.path.join(user_cache_dir(), CACHE_FILE)
+        try:
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+            connection = sqlite3.connect(path)
+            cache = cls(connection, max_entries, warm_entries)
+            cache.prepare(digest.hex())
+            cache.warm(warm_entries)
+        except (OSError, sqlite3.Error) as e:
+            print(f"Warning: Could not open the query cache '{path}' ({e}), running without it.")
+            return None
+        return cache
+
+    def prepare(self, version):
+        """Creates the tables, and drops every entry when the data or cache format changed."""
+        with self.connection:
+            self.connection.execute("PRAGMA journal_mode=WAL")
+            self.connection.execute("CREATE TABLE IF NOT EXISTS meta (name TEXT PRIMARY KEY, value TEXT NOT NULL)")
+            self.connection.execute("CREATE TABLE IF NOT EXISTS entries (kind TEXT NOT NULL, key TEXT NOT NULL, "
+                                    "value TEXT NOT NULL, used INTEGER NOT NULL, PRIMARY KEY (kind, key))")
+            self.connection.execute("CREATE INDEX IF NOT EXISTS entries_used ON entries (used)")
+            version = f"{CACHE_VERSION}:{version}"
+            row = self.connection.execute("SELECT value FROM meta WHERE name = 'version'").fetchone()
+            if row is None or row[0] != version:
+                self.connection.execute("DELETE FROM entries")
+                self.connection.execute("INSERT OR REPLACE INTO meta (name, value) VALUES ('version', ?)", (version,))
+            self.last_use = self.connection.execute("SELECT MAX(used) FROM entries").fetchone()[0] or 0
+
+    def warm(self, count):
+        """Reads the most recently used entries into memory."""
+        rows = self.connection.execute("SELECT kind, key, value FROM entries ORDER BY used DESC LIMIT ?", (count,)).fetchall()
+        # Least recent first, so the memory LRU ends up in the same order
+        for kind, key, value in reversed(rows):
+            try:
+                self.memory.put((kind, key), json.loads(value))
+            except ValueError:
+                # A corrupt entry is a miss; it is overwritten when the query runs again
+                continue
+
+    def get(self, kind, key):
+        """Returns the cached result of a query, or None."""
+        value = self.memory.get((kind, key))
+        if value is None:
+            row = self.connection.execute("SELECT value FROM entries WHERE kind = ? AND key = ?", (kind, key)).fetchone()
+            if row is None:
+                return None
+            try:
+                value = json.loads(row[0])
+            except ValueError:
+                return None
+            self.memory.put((kind, key), value)
+        # Moved to the end, keeping a write that is still pending
+        self.pending[(kind, key)] = self.pending.pop((kind, key), None)
+        return value
+
+    def put(self, kind, key, value):
+        """Caches the result of a query; value must be JSON serializable."""
+        self.memory.put((kind, key), value)
+        self.pending.pop((kind, key), None)
+        self.pending[(kind, key)] = json.dumps(value, ensure_ascii=False)
+        if len(self.pending) >= FLUSH_EVERY:
+            self.flush()
+
+    def flush(self):
+        """Writes the pending results and uses to disk, then evicts the least recently used entries."""
+        if not self.pending:
+            return
+        writes = []
+        uses = []
+        for (kind, key), value in self.pending.items():
+            self.last_use += 1
+            if value is None:
+                uses.append((self.last_use, kind, key))
+            else:
+                writes.append((kind, key, value, self.last_use))
+        self.pending = {}
+        try:
+            with self.connection:
+                self.connection.executemany("INSERT OR REPLACE INTO entries (kind, key, value, used) VALUES (?, ?, ?, ?)", writes)
+                self.connection.executemany("UPDATE entries SET used = ? WHERE kind = ? AND key = ?", uses)
+                count = self.connection.execute("SELECT COUNT(*) FROM entries").fetchone()[0]
+                if count > self.max_entries:
+                    self.connection.execute("DELETE FROM entries WHERE rowid IN "
+                                            "(SELECT rowid FROM entries ORDER BY used LIMIT ?)", (count - self.max_entries,))
+        except sqlite3.Error as e:
+            print(f"Warning: Could not write the query cache ({e}).")
+
+    def close(self):
+        self.flush()
+        self.connection.close()
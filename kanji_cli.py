@@ -0,0 +1,221 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+# Copyright 2025 stormoid
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Batch command line mode for Fast Kanji.
+
+Reads one query per line from a file or stdin and writes one JSON result per line to stdout:
+
+    python kanji_cli.py queries.txt --details > results.jsonl
+    cat queries.jsonl | python kanji_cli.py --jobs 8
+
+A query line is either plain text, with component meanings separated by commas
+("tree, sun"), or a JSON object:
+
+    {"id": 7, "meanings": ["tree", "sun"], "components": ["木"], "common_only": false}
+
+The matching Kanji contain, for every meaning, at least one component matching it, and all
+of the listed "components". A JSON list or string is read as "meanings". JSON queries can also
+filter the Kanji by attribute ranges and sort them ("strokes", "grade", "jlpt" or "freq"):
+
+    {"components": ["木"], "ranges": {"strokes": [null, 8], "jlpt": [3, 4]}, "sort_by": "strokes", "descending": true}
+
+With --decompose the input is read as Japanese text instead, and every Kanji in it is broken
+down into its components, one JSON line per occurrence:
+
+    python kanji_cli.py --decompose --details article.txt > breakdown.jsonl
+"""
+import argparse
+import contextlib
+import itertools
+import json
+import sys
+from multiprocessing import Pool
+
+from kanji_engine import KANJI_ATTRIBUTES, KanjiEngine
+
+# Lines handed to the process pool at a time, which bounds memory use on long inputs
+BATCH_LINES_PER_JOB = 2000
+
+_engine = None
+_options = None
+
+
+def parse_query(line):
+    """Parses a query line into a dict with "meanings", "components" and optional "id"/"common_only"."""
+    text = line.strip()
+    if text[:1] in ('{', '[', '"'):
+        return normalize_query(json.loads(text))
+    return normalize_query({'meanings': text.split(',')})
+
+
+def _range_bound(attribute, bound):
+    """Converts one range bound to an int, or None for an open end."""
+    if bound is None:
+        return None
+    # JSON numbers such as 1e400 parse as infinite floats, which int() cannot convert
+    if isinstance(bound, float) and not bound.is_integer():
+        raise ValueError(f"the range bounds of '{attribute}' must be integers")
+    return int(bound)
+
+
+def normalize_query(query):
+    """Normalizes a decoded JSON query (object, list or string of meanings) into a query dict."""
+    if isinstance(query, str):
+        query = {'meanings': [query]}
+    elif isinstance(query, list):
+        query = {'meanings': query}
+    elif isinstance(query, dict):
+        query = dict(query)
+    else:
+        raise ValueError("a query must be a JSON object, list or string")
+
+    for key in ('meanings', 'components'):
+        values = query.get(key, [])
+        if isinstance(values, str):
+            values = [values]
+        query[key] = [str(value).strip() for value in values if str(value).strip()]
+
+    ranges = query.get('ranges') or {}
+    if not isinstance(ranges, dict):
+        raise ValueError("\"ranges\" must map attributes to [low, high] ranges")
+    query['ranges'] = {}
+    for attribute, bounds in ranges.items():
+        if attribute not in KANJI_ATTRIBUTES:
+            raise ValueError(f"unknown attribute '{attribute}' (expected one of {', '.join(KANJI_ATTRIBUTES)})")
+        if not isinstance(bounds, (list, tuple)) or len(bounds) != 2:
+            raise ValueError(f"the range of '{attribute}' must be [low, high]")
+        query['ranges'][attribute] = tuple(_range_bound(attribute, bound) for bound in bounds)
+    if query.get('sort_by') is not None and query['sort_by'] not in KANJI_ATTRIBUTES:
+        raise ValueError(f"unknown sort attribute '{query['sort_by']}' (expected one of {', '.join(KANJI_ATTRIBUTES)})")
+    return query
+
+
+def run_query(engine, query, common_only=True, details=False):
+    """Runs a parsed query and returns its result dict."""
+    common_only = bool(query.get('common_only', common_only))
+    meanings = query['meanings']
+    components = query['components']
+
+    bitmap = None
+    if meanings:
+        bitmap = engine.find_meanings_bitmap(meanings, common_only)
+    if components:
+        components_bitmap = engine.find_kanji_bitmap(components, common_only)
+        bitmap = components_bitmap if bitmap is None else bitmap & components_bitmap
+    bitmap = engine.filter_ranges(bitmap or 0, query['ranges'])
+    kanji = engine.sorted_kanji(bitmap, query.get('sort_by'), bool(query.get('descending', False)))
+
+    result = {}
+    if 'id' in query:
+        result['id'] = query['id']
+    result['meanings'] = meanings
+    if components:
+        result['components'] = components
+    result['matching_components'] = [match._asdict() for match in engine.find_matching_components(meanings)]
+    result['kanji'] = kanji
+    if details:
+        result['details'] = [kanji_details._asdict() if kanji_details else None
+                             for kanji_details in map(engine.kanji_details, kanji)]
+    return result
+
+
+def process_line(numbered_line):
+    """Resolves one numbered input line into a JSON result line (None for blank lines)."""
+    line_number, line = numbered_line
+    if not line.strip():
+        return None
+    try:
+        result = run_query(_engine, parse_query(line), **_options)
+    except (ValueError, TypeError) as e:
+        result = {'error': str(e)}
+    result['line'] = line_number
+    return json.dumps(result, ensure_ascii=False)
+
+
+def load_engine():
+    """Loads the engine, keeping the loaders' messages off stdout, which carries the results."""
+    with contextlib.redirect_stdout(sys.stderr):
+        return KanjiEngine.load()
+
+
+def init_worker(options):
+    """Sets up the engine and options of a worker (or of the current process)."""
+    global _engine, _options
+    # Forked workers inherit the parent's engine; spawned ones load their own
+    if _engine is None:
+        _engine = load_engine()
+    _options = options
+
+
+def run(lines, out, options, jobs=1):
+    """Streams the results of the input lines to out, optionally over a process pool."""
+    numbered_lines = enumerate(lines, 1)
+    if jobs <= 1:
+        for line in numbered_lines:
+            output = process_line(line)
+            if output is not None:
+                out.write(output + "\n")
+        return
+
+    with Pool(jobs, initializer=init_worker, initargs=(options,)) as pool:
+        while True:
+            batch = list(itertools.islice(numbered_lines, BATCH_LINES_PER_JOB * jobs))
+            if not batch:
+                break
+            for output in pool.imap(process_line, batch, chunksize=max(1, BATCH_LINES_PER_JOB // 8)):
+                if output is not None:
+                    out.write(output + "\n")
+
+
+def decompose(engine, lines, out, details=False):
+    """Streams the breakdown of every Kanji of the input text to out, one JSON line per occurrence."""
+    for line_number, line in enumerate(lines, 1):
+        for breakdown in engine.decompose_text(line, details):
+            result = breakdown.to_dict()
+            result['line'] = line_number
+            out.write(json.dumps(result, ensure_ascii=False) + "\n")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Resolve component meaning queries to Kanji, one JSON result per line.")
+    parser.add_argument('input', nargs='?', default='-', help="query file, one query per line (default: stdin)")
+    parser.add_argument('--all-kanji', action='store_true', help="include uncommon Kanji (default: common Kanji only)")
+    parser.add_argument('--details', action='store_true', help="include the Kanjidic2 details of every Kanji")
+    parser.add_argument('--jobs', type=int, default=1, help="number of worker processes (default: 1)")
+    parser.add_argument('--decompose', action='store_true',
+                        help="read Japanese text and write the components of every Kanji in it (ignores --jobs)")
+    args = parser.parse_args(argv)
+
+    options = {'common_only': not args.all_kanji, 'details': args.details}
+    init_worker(options)
+
+    sys.stdout.reconfigure(encoding='utf-8')
+    if args.input == '-':
+        sys.stdin.reconfigure(encoding='utf-8')
+        lines = sys.stdin
+    else:
+        lines = open(args.input, 'r', encoding='utf-8')
+    with lines:
+        if args.decompose:
+            decompose(_engine, lines, sys.stdout, args.details)
+        else:
+            run(lines, sys.stdout, options, args.jobs)
+
+
+if __name__ == "__main__":
+    main()
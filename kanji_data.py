@@ -0,0 +1,597 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+# Copyright 2025 stormoid
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Data loading and indexes for Fast Kanji.
+
+The component (RADKFILE) and Kanjidic2 data are either parsed from the JSON files in data/,
+or memory-mapped from a precompiled binary bundle. Run this module to (re)build the bundle:
+
+    python kanji_data.py
+
+Bundle layout (all integers little-endian):
+    header   magic b"FKJB", u32 version, 32-byte sha256 of the source JSON files,
+             u32 crc32 of everything after the header, u32 section count
+    table    per section: 8-byte name, u32 offset, u32 length
+    payload  sections; string tables are u32 count, u32 offsets[count + 1], utf-8 blob
+"""
+import hashlib
+import json
+import mmap
+import os
+import struct
+import sys
+import time
+import zlib
+from array import array
+from bisect import bisect_left, bisect_right
+from collections import Counter
+from collections.abc import Mapping, Sequence
+from itertools import compress
+from operator import itemgetter
+
+DATA_FILE = "fullcomps.json"
+KANJIDIC_FILE = "kanjidic2_stripped.json"
+BUNDLE_FILE = "fast_kanji.bundle"
+
+BUNDLE_MAGIC = b"FKJB"
+BUNDLE_VERSION = 2
+_HEADER = struct.Struct("<4sI32sII")
+_SECTION = struct.Struct("<8sII")
+
+# Texts are indexed by their trigrams, padded at the start so that prefixes share the leading ones,
+# and by their bigrams for queries too short for the trigrams to rule anything out
+NGRAM_SIZE = 3
+SHORT_NGRAM_SIZE = 2
+
+# Per-kanji attributes that results can be filtered and sorted by
+KANJI_ATTRIBUTES = ('strokes', 'grade', 'jlpt', 'freq')
+
+
+def resource_path(relative_path):
+    """ Get absolute path to resource, works for dev and for PyInstaller """
+    try:
+        # PyInstaller creates a temp folder and stores path in _MEIPASS
+        base_path = sys._MEIPASS
+    except Exception:
+        base_path = os.path.abspath("./data")
+
+    return os.path.join(base_path, relative_path)
+
+
+def load_json(file_path):
+    """Loads a JSON data file, returning an empty dict if it is missing or invalid."""
+    try:
+        with open(file_path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except FileNotFoundError:
+        print(f"Error: File '{file_path}' not found.")
+        return {}
+    except json.JSONDecodeError:
+        print(f"Error: Invalid JSON format in '{file_path}'.")
+        return {}
+
+
+def source_digest(*file_paths):
+    """Returns the sha256 digest of the given files, or None if any of them is missing."""
+    digest = hashlib.sha256()
+    for file_path in file_paths:
+        try:
+            with open(file_path, 'rb') as f:
+                digest.update(f.read())
+        except OSError:
+            return None
+    return digest.digest()
+
+
+def _read_array(typecode, view):
+    """Copies a little-endian array out of a buffer."""
+    values = array(typecode)
+    values.frombytes(view)
+    if sys.byteorder == 'big':
+        values.byteswap()
+    return values
+
+
+def _array_bytes(values):
+    """Returns the little-endian bytes of an array."""
+    if sys.byteorder == 'big':
+        values = array(values.typecode, values)
+        values.byteswap()
+    return values.tobytes()
+
+
+def _pack_strings(strings):
+    """Packs a list of strings into a string table section."""
+    offsets = array('I', [0])
+    blob = bytearray()
+    for string in strings:
+        blob += string.encode('utf-8')
+        offsets.append(len(blob))
+    return struct.pack("<I", len(strings)) + _array_bytes(offsets) + bytes(blob)
+
+
+class BundleStrings(Sequence):
+    """A string table section, decoding each string on access."""
+
+    def __init__(self, view):
+        count = struct.unpack_from("<I", view)[0]
+        self.offsets = _read_array('I', view[4:8 + 4 * count])
+        self.blob = view[8 + 4 * count:]
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        return str(self.blob[self.offsets[index]:self.offsets[index + 1]], 'utf-8')
+
+    def to_list(self):
+        """Decodes the whole table at once."""
+        text = str(self.blob, 'utf-8')
+        if len(text) == len(self):
+            # Every string is a single code point (e.g. kanji literals)
+            return list(text)
+        return list(self)
+
+
+class BundleEntries(Sequence):
+    """Kanjidic2 entries stored as JSON strings, parsed on access."""
+
+    def __init__(self, strings):
+        self.strings = strings
+
+    def __len__(self):
+        return len(self.strings)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        text = self.strings[index]
+        return json.loads(text) if text else None
+
+
+class BundleBitmaps(Mapping):
+    """Component bitmaps decoded from the bundle's posting lists on first access."""
+
+    def __init__(self, component_names, offsets, postings, kanji_count):
+        self.rows = {component: row for row, component in enumerate(component_names)}
+        self.offsets = offsets
+        self.postings = postings
+        self.kanji_count = kanji_count
+        self.cache = {}
+
+    def __len__(self):
+        return len(self.rows)
+
+    def __iter__(self):
+        return iter(self.rows)
+
+    def __contains__(self, component):
+        return component in self.rows
+
+    def __getitem__(self, component):
+        bitmap = self.cache.get(component)
+        if bitmap is None:
+            row = self.rows[component]
+            start, end = self.offsets[row], self.offsets[row + 1]
+            bits = bytearray((self.kanji_count + 7) // 8)
+            for kanji_id in _read_array('H', self.postings[2 * start:2 * end]):
+                bits[kanji_id >> 3] |= 1 << (kanji_id & 7)
+            bitmap = self.cache[component] = int.from_bytes(bits, 'little')
+        return bitmap
+
+
+def text_ngrams(text, size=NGRAM_SIZE):
+    """Returns the set of padded n-grams (trigrams by default) of a normalized text."""
+    padded = "\0" * (size - 1) + text
+    return {padded[i:i + size] for i in range(len(text))}
+
+
+class NgramIndex:
+    """Trigram and bigram postings over a list of texts, for finding the texts that nearly start with a query."""
+
+    def __init__(self, texts):
+        self.texts = texts
+        # Both sizes share the dict, since their keys differ in length
+        postings = {}
+        for index, text in enumerate(texts):
+            for gram in text_ngrams(text) | text_ngrams(text, SHORT_NGRAM_SIZE):
+                postings.setdefault(gram, []).append(index)
+        self.postings = {gram: array('I', indexes) for gram, indexes in postings.items()}
+
+    def candidates(self, query, min_shared, size=NGRAM_SIZE):
+        """Returns the indexes of the texts sharing at least min_shared n-grams of the given size with the start of query."""
+        counts = Counter()
+        for gram in text_ngrams(query, size):
+            counts.update(self.postings.get(gram, ()))
+        return [index for index, count in counts.items() if count >= min_shared]
+
+
+class AttributeIndex:
+    """A per-kanji attribute column presorted for range filters and sorting.
+
+    The kanji with the value 0 (unknown) never fall in a range and sort last.
+    """
+
+    def __init__(self, column, kanji_literals):
+        known = [kanji_id for kanji_id, value in enumerate(column) if value]
+        unknown = [kanji_id for kanji_id, value in enumerate(column) if not value]
+        # Stable sorts, so equal values stay in kanji ID order both ways
+        self.ascending = array('I', sorted(known, key=column.__getitem__) + unknown)
+        self.descending = array('I', sorted(known, key=column.__getitem__, reverse=True) + unknown)
+        self.orders = {
+            False: (itemgetter(*self.ascending), [kanji_literals[kanji_id] for kanji_id in self.ascending]),
+            True: (itemgetter(*self.descending), [kanji_literals[kanji_id] for kanji_id in self.descending]),
+        }
+
+        # cumulative[i] is the bitmap of the kanji with a value up to values[i]
+        self.values = []
+        self.cumulative = []
+        bits = bytearray((len(column) + 7) // 8)
+        for kanji_id in self.ascending[:len(known)]:
+            value = column[kanji_id]
+            if self.values and value != self.values[-1]:
+                self.cumulative.append(int.from_bytes(bits, 'little'))
+            if not self.values or value != self.values[-1]:
+                self.values.append(value)
+            bits[kanji_id >> 3] |= 1 << (kanji_id & 7)
+        if known:
+            self.cumulative.append(int.from_bytes(bits, 'little'))
+
+    def range_bitmap(self, low=None, high=None):
+        """Returns the bitmap of the kanji with a value from low to high (inclusive, None for open)."""
+        end = len(self.values) if high is None else bisect_right(self.values, high)
+        start = 0 if low is None else bisect_left(self.values, low)
+        if end <= start:
+            return 0
+        return self.cumulative[end - 1] ^ (self.cumulative[start - 1] if start else 0)
+
+    def sorted_kanji(self, selectors, descending=False):
+        """Returns the kanji whose selector byte (indexed by kanji ID) is set, in attribute order."""
+        pick, literals = self.orders[descending]
+        return list(compress(literals, pick(selectors)))
+
+
+class KanjiData:
+    """The loaded component and Kanjidic2 data, with the indexes the searches run on.
+
+    Kanji are identified by dense IDs in result order (frequency rank first, then the kanji
+    without one by stroke count); index i of every per-kanji column describes kanji ID i.
+    """
+
+    def __init__(self):
+        self.source = None
+        self.load_time = 0.0
+        self.bundle = None
+        # sha256 of the source JSON files, identifying the data version (None if unknown)
+        self.digest = None
+
+        # component -> {'stroke_count': int, 'meaning': str}, in RADKFILE order
+        self.components = {}
+        self.component_names = []
+
+        # Sorted normalized meaning tokens, and the component row owning each one
+        self.meaning_tokens = []
+        self.meaning_token_rows = []
+
+        self.kanjidic_index = {}
+        self.kanji_literals = []
+        self.kanji_entries = []
+        self.kanji_freq = array('H')
+        self.kanji_grade = array('B')
+        self.kanji_jlpt = array('B')
+        self.kanji_strokes = array('B')
+
+        # component -> bitmap (a Python int, bit i = kanji ID i)
+        self.component_bitmaps = {}
+        self.common_mask = 0
+
+        # Inverse index: the component rows of kanji ID i are
+        # kanji_component_rows[kanji_component_offsets[i]:kanji_component_offsets[i + 1]]
+        self.kanji_component_offsets = array('I')
+        self.kanji_component_rows = array('H')
+
+        # Fuzzy search indexes, built on first use
+        self.meaning_ngrams = None
+        self.kanji_meanings = None
+        self.kanji_meaning_ids = None
+        self.kanji_meaning_ngrams = None
+        # attribute name -> AttributeIndex, built on first use
+        self.attribute_indexes = {}
+
+    @classmethod
+    def load(cls, data_file=DATA_FILE, kanjidic_file=KANJIDIC_FILE, bundle_file=BUNDLE_FILE):
+        """Loads from the bundle when it is present and up to date, otherwise from the JSON files."""
+        start = time.perf_counter()
+        data_file_path = resource_path(data_file)
+        kanjidic_file_path = resource_path(kanjidic_file)
+        bundle_file_path = resource_path(bundle_file)
+
+        digest = source_digest(data_file_path, kanjidic_file_path)
+        data = None
+        if os.path.exists(bundle_file_path):
+            data = cls.from_bundle(bundle_file_path, digest)
+        if data is None:
+            data = cls.from_json(data_file_path, kanjidic_file_path)
+        # Without the JSON files, a bundle still knows the digest of the files it was built from
+        data.digest = digest or data.digest
+
+        data.load_time = time.perf_counter() - start
+        return data
+
+    @classmethod
+    def from_json(cls, data_file_path, kanjidic_file_path):
+        """Parses the JSON data files and builds every index."""
+        data = cls()
+        data.source = "json"
+        data.build_indexes(load_json(data_file_path), load_json(kanjidic_file_path))
+        return data
+
+    def build_indexes(self, kanji_data, kanjidic_data):
+        """Builds the indexes from the parsed fullcomps.json and Kanjidic2 data."""
+        self.components = kanji_data
+        self.build_meaning_index()
+        self.build_kanjidic_index(kanjidic_data)
+        self.build_component_bitmaps()
+        self.build_kanji_components()
+
+    def build_meaning_index(self):
+        """Builds a sorted prefix index over the normalized component meaning tokens."""
+        self.component_names = list(self.components)
+        pairs = []
+        for row, component in enumerate(self.component_names):
+            details = self.components[component]
+            if 'meaning' in details:
+                for token in details['meaning'].split(','):
+                    pairs.append((token.strip().lower(), row))
+        pairs.sort()
+        self.meaning_tokens = [token for token, _ in pairs]
+        self.meaning_token_rows = [row for _, row in pairs]
+
+    def meaning_ngram_index(self):
+        """Returns the trigram index over the meaning tokens, building it on first use."""
+        if self.meaning_ngrams is None:
+            self.meaning_ngrams = NgramIndex(self.meaning_tokens)
+        return self.meaning_ngrams
+
+    def kanji_meaning_ngram_index(self):
+        """Returns the trigram index over the normalized Kanjidic2 meanings, building it on first use.
+
+        kanji_meanings lists the distinct meanings indexed, kanji_meaning_ids the kanji IDs having each.
+        """
+        if self.kanji_meaning_ngrams is None:
+            kanji_ids = {}
+            for kanji_id, entry in enumerate(self.kanji_entries):
+                if entry:
+                    for meaning in entry.get('reading_meaning', {}).get('meaning', []):
+                        kanji_ids.setdefault(meaning.strip().lower(), []).append(kanji_id)
+            self.kanji_meanings = list(kanji_ids)
+            self.kanji_meaning_ids = list(kanji_ids.values())
+            self.kanji_meaning_ngrams = NgramIndex(self.kanji_meanings)
+        return self.kanji_meaning_ngrams
+
+    def attribute_index(self, attribute):
+        """Returns the AttributeIndex of one of KANJI_ATTRIBUTES, building it on first use."""
+        index = self.attribute_indexes.get(attribute)
+        if index is None:
+            columns = {'strokes': self.kanji_strokes, 'grade': self.kanji_grade, 'jlpt': self.kanji_jlpt, 'freq': self.kanji_freq}
+            if attribute not in columns:
+                raise ValueError(f"unknown attribute '{attribute}' (expected one of {', '.join(KANJI_ATTRIBUTES)})")
+            index = self.attribute_indexes[attribute] = AttributeIndex(columns[attribute], self.kanji_literals)
+        return index
+
+    def build_kanjidic_index(self, kanjidic_data):
+        """Assigns kanji IDs to the Kanjidic2 entries and fills the per-kanji columns."""
+        def result_order(entry):
+            freq = int(entry.get('freq') or 0)
+            return (freq == 0, freq, int(entry.get('stroke_count') or 0), entry.get('literal'))
+
+        for entry in sorted(kanjidic_data, key=result_order):
+            self.add_kanji_id(entry.get('literal'), entry)
+
+    def add_kanji_id(self, kanji, entry=None):
+        """Assigns the next kanji ID to kanji and appends its attributes to the columns."""
+        kanji_id = len(self.kanji_literals)
+        self.kanjidic_index[kanji] = kanji_id
+        self.kanji_literals.append(kanji)
+        self.kanji_entries.append(entry)
+        entry = entry or {}
+        self.kanji_freq.append(int(entry.get('freq') or 0))
+        self.kanji_grade.append(int(entry.get('grade') or 0))
+        self.kanji_jlpt.append(int(entry.get('jlpt') or 0))
+        self.kanji_strokes.append(int(entry.get('stroke_count') or 0))
+        return kanji_id
+
+    def build_component_bitmaps(self):
+        """Builds one bitmap per component, plus the common kanji mask."""
+        for component, details in self.components.items():
+            bitmap = 0
+            for kanji in details.get('kanji', []):
+                kanji_id = self.kanjidic_index.get(kanji)
+                if kanji_id is None:
+                    # Kanji missing from Kanjidic sort after every known one
+                    kanji_id = self.add_kanji_id(kanji)
+                bitmap |= 1 << kanji_id
+            self.component_bitmaps[component] = bitmap
+
+        for kanji_id, freq in enumerate(self.kanji_freq):
+            if freq:
+                self.common_mask |= 1 << kanji_id
+
+    def build_kanji_components(self):
+        """Builds the inverse index from kanji IDs to the rows of their components, in RADKFILE order."""
+        rows_by_kanji = [[] for _ in self.kanji_literals]
+        for row, component in enumerate(self.component_names):
+            for kanji_id in self.component_kanji_ids(component):
+                rows_by_kanji[kanji_id].append(row)
+
+        self.kanji_component_offsets = array('I', [0])
+        self.kanji_component_rows = array('H')
+        for rows in rows_by_kanji:
+            self.kanji_component_rows.extend(rows)
+            self.kanji_component_offsets.append(len(self.kanji_component_rows))
+
+    def kanji_component_rows_of(self, kanji_id):
+        """Returns the component rows of a kanji ID."""
+        return self.kanji_component_rows[self.kanji_component_offsets[kanji_id]:self.kanji_component_offsets[kanji_id + 1]]
+
+    def component_kanji_ids(self, component):
+        """Returns the sorted kanji IDs of a component."""
+        bits = bin(self.component_bitmaps[component])[:1:-1]
+        return [kanji_id for kanji_id, bit in enumerate(bits) if bit == '1']
+
+    def write_bundle(self, bundle_file_path, digest):
+        """Writes the loaded data and indexes to a binary bundle."""
+        offsets = array('I', [0])
+        postings = array('H')
+        for component in self.component_names:
+            postings.extend(self.component_kanji_ids(component))
+            offsets.append(len(postings))
+
+        entries = [json.dumps(entry, ensure_ascii=False, separators=(',', ':')) if entry else ""
+                   for entry in self.kanji_entries]
+        sections = [
+            (b"complits", _pack_strings(self.component_names)),
+            (b"compmean", _pack_strings([self.components[c].get('meaning', "") for c in self.component_names])),
+            (b"compstrk", _array_bytes(array('B', [int(self.components[c].get('stroke_count') or 0) for c in self.component_names]))),
+            (b"postoffs", _array_bytes(offsets)),
+            (b"postings", _array_bytes(postings)),
+            (b"tokens", _pack_strings(self.meaning_tokens)),
+            (b"tokrows", _array_bytes(array('H', self.meaning_token_rows))),
+            (b"kanjilit", _pack_strings(self.kanji_literals)),
+            (b"freq", _array_bytes(self.kanji_freq)),
+            (b"grade", _array_bytes(self.kanji_grade)),
+            (b"jlpt", _array_bytes(self.kanji_jlpt)),
+            (b"strokes", _array_bytes(self.kanji_strokes)),
+            (b"common", self.common_mask.to_bytes((len(self.kanji_literals) + 7) // 8, 'little')),
+            (b"kcompoff", _array_bytes(self.kanji_component_offsets)),
+            (b"kcomprow", _array_bytes(self.kanji_component_rows)),
+            (b"entries", _pack_strings(entries)),
+        ]
+
+        table = bytearray()
+        payload = bytearray()
+        offset = _HEADER.size + _SECTION.size * len(sections)
+        for name, section in sections:
+            table += _SECTION.pack(name, offset + len(payload), len(section))
+            payload += section
+            # Keep every section 4-byte aligned
+            payload += bytes(-len(payload) % 4)
+        body = bytes(table + payload)
+
+        header = _HEADER.pack(BUNDLE_MAGIC, BUNDLE_VERSION, digest, zlib.crc32(body), len(sections))
+        temp_path = bundle_file_path + ".tmp"
+        with open(temp_path, 'wb') as f:
+            f.write(header)
+            f.write(body)
+        os.replace(temp_path, bundle_file_path)
+
+    @classmethod
+    def from_bundle(cls, bundle_file_path, digest=None):
+        """Memory-maps a bundle, or returns None if it is unreadable, corrupt or stale.
+
+        The digest of the source JSON files is compared when given; without the JSON files
+        (e.g. in a build shipping only the bundle) the bundle is trusted as is.
+        """
+        try:
+            with open(bundle_file_path, 'rb') as f:
+                buf = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            magic, version, bundle_digest, crc, section_count = _HEADER.unpack_from(buf)
+        except (OSError, ValueError, struct.error):
+            print(f"Error: Could not read bundle '{bundle_file_path}'.")
+            return None
+
+        view = memoryview(buf)
+        if magic != BUNDLE_MAGIC or version != BUNDLE_VERSION or zlib.crc32(view[_HEADER.size:]) != crc:
+            print(f"Warning: Bundle '{bundle_file_path}' is invalid, loading the JSON data instead.")
+            return None
+        if digest is not None and digest != bundle_digest:
+            print(f"Warning: Bundle '{bundle_file_path}' is out of date, loading the JSON data instead. "
+                  "Rebuild it with 'python kanji_data.py'.")
+            return None
+
+        sections = {}
+        for index in range(section_count):
+            name, offset, length = _SECTION.unpack_from(buf, _HEADER.size + index * _SECTION.size)
+            sections[name.rstrip(b"\0").decode('ascii')] = view[offset:offset + length]
+
+        data = cls()
+        data.source = "bundle"
+        data.digest = bundle_digest
+        # Keep the mapping alive for the lazily decoded sections
+        data.bundle = buf
+
+        data.component_names = BundleStrings(sections["complits"]).to_list()
+        meanings = BundleStrings(sections["compmean"]).to_list()
+        strokes = _read_array('B', sections["compstrk"])
+        for row, component in enumerate(data.component_names):
+            details = data.components[component] = {'stroke_count': strokes[row]}
+            # Components without a meaning (stored as an empty string) are never listed
+            if meanings[row]:
+                details['meaning'] = meanings[row]
+
+        data.meaning_tokens = BundleStrings(sections["tokens"]).to_list()
+        data.meaning_token_rows = _read_array('H', sections["tokrows"])
+
+        data.kanji_literals = BundleStrings(sections["kanjilit"]).to_list()
+        data.kanjidic_index = dict(zip(data.kanji_literals, range(len(data.kanji_literals))))
+        data.kanji_entries = BundleEntries(BundleStrings(sections["entries"]))
+        data.kanji_freq = _read_array('H', sections["freq"])
+        data.kanji_grade = _read_array('B', sections["grade"])
+        data.kanji_jlpt = _read_array('B', sections["jlpt"])
+        data.kanji_strokes = _read_array('B', sections["strokes"])
+
+        data.component_bitmaps = BundleBitmaps(data.component_names, _read_array('I', sections["postoffs"]),
+                                               sections["postings"], len(data.kanji_literals))
+        data.common_mask = int.from_bytes(sections["common"], 'little')
+        data.kanji_component_offsets = _read_array('I', sections["kcompoff"])
+        data.kanji_component_rows = _read_array('H', sections["kcomprow"])
+        return data
+
+
+def build_bundle(data_file=DATA_FILE, kanjidic_file=KANJIDIC_FILE, bundle_file=BUNDLE_FILE):
+    """Compiles the JSON data files into the binary bundle."""
+    data_file_path = resource_path(data_file)
+    kanjidic_file_path = resource_path(kanjidic_file)
+    digest = source_digest(data_file_path, kanjidic_file_path)
+    if digest is None:
+        print("Error: The JSON data files are needed to build the bundle.")
+        return None
+
+    bundle_file_path = resource_path(bundle_file)
+    KanjiData.from_json(data_file_path, kanjidic_file_path).write_bundle(bundle_file_path, digest)
+    return bundle_file_path
+
+
+def main():
+    bundle_file_path = build_bundle()
+    if bundle_file_path is None:
+        sys.exit(1)
+    print(f"Wrote '{bundle_file_path}' ({os.path.getsize(bundle_file_path)} bytes).")
+
+    # Report startup timings for both load paths
+    json_start = time.perf_counter()
+    KanjiData.from_json(resource_path(DATA_FILE), resource_path(KANJIDIC_FILE))
+    json_time = time.perf_counter() - json_start
+    bundle_data = KanjiData.load()
+    print(f"Startup: JSON {json_time * 1000:.1f} ms, {bundle_data.source} {bundle_data.load_time * 1000:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
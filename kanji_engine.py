@@ -0,0 +1,530 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+# Copyright 2025 stormoid
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Headless query engine for Fast Kanji.
+
+Owns the loaded data and indexes and answers the component and Kanji queries, without
+importing tkinter, so it can be used from scripts, batch jobs and services:
+
+    engine = KanjiEngine.load()
+    components = engine.find_matching_components(["tree"])
+    ranked = engine.rank_matching_components(["moutn"])     # typo tolerant, best first
+    kanji = engine.find_kanji_with_all_components({"木", "日"}, common_only=True)
+    easy = engine.find_kanji_with_all_components({"木"}, ranges={'strokes': (None, 8), 'jlpt': (3, 4)}, sort_by='strokes')
+    details = engine.kanji_details(kanji[0])
+    for breakdown in engine.decompose_text("日本語の文章"):
+        print(breakdown.format_breakdown())
+"""
+import threading
+from bisect import bisect_left
+from collections import OrderedDict
+from itertools import compress
+from typing import List, NamedTuple, Optional
+
+from kanji_data import DATA_FILE, KANJI_ATTRIBUTES, KANJIDIC_FILE, NGRAM_SIZE, SHORT_NGRAM_SIZE, KanjiData, text_ngrams
+
+# Above this many results, bitmap_kanji selects from the whole Kanji table instead of seeking set bits
+DENSE_BITMAP_THRESHOLD = 256
+_BIT_SELECTORS = bytes.maketrans(b'01', b'\x00\x01')
+
+# int.bit_count is only available from Python 3.10
+popcount = getattr(int, 'bit_count', None) or (lambda bitmap: bin(bitmap).count('1'))
+
+# Fuzzy meaning search allows one typo from this many characters on, and two from twice as many
+FUZZY_MIN_LENGTH = 4
+DEFAULT_FUZZY_LIMIT = 50
+
+
+class ComponentMatch(NamedTuple):
+    """A component whose meaning matched a search."""
+    component: str
+    meaning: str
+    stroke_count: int
+
+
+class RankedComponentMatch(NamedTuple):
+    """A component whose meaning matched a fuzzy search, with a score from 0 to 1 (exact)."""
+    component: str
+    meaning: str
+    stroke_count: int
+    score: float
+
+
+class RankedKanjiMatch(NamedTuple):
+    """A Kanji whose Kanjidic2 meaning matched a fuzzy search, with a score from 0 to 1 (exact)."""
+    literal: str
+    meaning: str
+    score: float
+
+
+class KanjiDetails(NamedTuple):
+    """The Kanjidic2 details of a Kanji."""
+    literal: str
+    meanings: List[str]
+    readings_on: List[str]
+    readings_kun: List[str]
+    grade: Optional[int]
+    stroke_count: Optional[int]
+    freq: Optional[int]
+    jlpt: Optional[int]
+
+    @property
+    def jisho_url(self):
+        return f"https://jisho.org/search/{self.literal}%20%23kanji"
+
+    @property
+    def kanshudo_url(self):
+        return f"https://www.kanshudo.com/kanji/{self.literal}"
+
+    def format_details(self):
+        """Formats the meanings, readings and attributes as display text."""
+        details = ""
+
+        # Meanings
+        if self.meanings:
+            details += "Meanings: " + ", ".join(self.meanings) + "\n"
+
+        # Readings
+        if self.readings_on or self.readings_kun:
+            details += "\nReadings:\n"
+            if self.readings_on:
+                details += "On: " + "  or  ".join(self.readings_on) + "\n"
+            if self.readings_kun:
+                details += "Kun: " + "  or  ".join(self.readings_kun) + "\n"
+
+        details += "\n"
+        if self.grade:
+            details += f"Grade: {self.grade}\n"
+        if self.stroke_count:
+            details += f"Stroke Count: {self.stroke_count}\n"
+        if self.freq:
+            details += f"Frequency: {self.freq}\n"
+        if self.jlpt:
+            details += f"JLPT Level: {self.jlpt}\n"
+
+        return details
+
+
+class CharacterBreakdown(NamedTuple):
+    """The components and Kanjidic2 details of a Kanji at a position of a text."""
+    position: int
+    literal: str
+    components: List[ComponentMatch]
+    details: Optional[KanjiDetails]
+
+    def to_dict(self):
+        return {
+            'position': self.position,
+            'literal': self.literal,
+            'components': [component._asdict() for component in self.components],
+            'details': self.details._asdict() if self.details else None,
+        }
+
+    def format_breakdown(self):
+        """Formats the components and a summary of the details as display text."""
+        breakdown = self.literal
+        if self.details and self.details.meanings:
+            breakdown += "  " + ", ".join(self.details.meanings)
+        breakdown += "\n    Components: " + ", ".join(
+            f"{component.component} {component.meaning or '-'} ({component.stroke_count})" for component in self.components) + "\n"
+        if self.details:
+            if self.details.readings_on:
+                breakdown += "    On: " + ", ".join(self.details.readings_on) + "\n"
+            if self.details.readings_kun:
+                breakdown += "    Kun: " + ", ".join(self.details.readings_kun) + "\n"
+        return breakdown
+
+
+class LRUCache:
+    """A bounded mapping that evicts the least recently used entry, safe to share between threads."""
+
+    def __init__(self, maxsize):
+        self.maxsize = maxsize
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        with self.lock:
+            value = self.entries.get(key)
+            if value is None:
+                self.misses += 1
+                return None
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key, value):
+        with self.lock:
+            self.entries[key] = value
+            self.entries.move_to_end(key)
+            if len(self.entries) > self.maxsize:
+                self.entries.popitem(last=False)
+
+    def __contains__(self, key):
+        return key in self.entries
+
+    def stats(self):
+        return {'size': len(self.entries), 'maxsize': self.maxsize, 'hits': self.hits, 'misses': self.misses}
+
+
+def _optional_int(value):
+    return int(value) if value else None
+
+
+def max_typos(query):
+    """Returns how many edits a fuzzy search for query tolerates."""
+    return len(query) // FUZZY_MIN_LENGTH if len(query) < 2 * FUZZY_MIN_LENGTH else 2
+
+
+def prefix_edit_distance(query, text, max_distance):
+    """Returns the edit distance between query and the closest prefix of text, or None if above max_distance.
+
+    Insertions, deletions, substitutions and swaps of adjacent characters count as one edit.
+    """
+    before_previous = None
+    previous = list(range(len(query) + 1))
+    best = previous[-1]
+    # Prefixes longer than the query plus max_distance are never close enough
+    text = text[:len(query) + max_distance]
+    for j, char in enumerate(text, 1):
+        current = [j]
+        for i, query_char in enumerate(query, 1):
+            distance = min(previous[i] + 1, current[i - 1] + 1, previous[i - 1] + (query_char != char))
+            if i > 1 and j > 1 and query_char == text[j - 2] and query[i - 2] == char:
+                distance = min(distance, before_previous[i - 2] + 1)
+            current.append(distance)
+        best = min(best, current[-1])
+        # Later rows build on this one, or on the previous one through a swap
+        if min(current) > max_distance and min(previous) >= max_distance:
+            break
+        before_previous, previous = previous, current
+    return best if best <= max_distance else None
+
+
+def fuzzy_scores(index, query):
+    """Returns {text index: score} for the texts of an NgramIndex within max_typos of starting with query."""
+    max_distance = max_typos(query)
+    # An edit changes at most size of the query's n-grams, a swap one more. Short queries can
+    # match without sharing a trigram, so they filter on bigrams, or check every text if even
+    # those could all differ
+    candidates = range(len(index.texts))
+    for size in (NGRAM_SIZE, SHORT_NGRAM_SIZE):
+        min_shared = len(text_ngrams(query, size)) - (size + 1) * max_distance
+        if min_shared > 0:
+            candidates = index.candidates(query, min_shared, size)
+            break
+    scores = {}
+    for text_index in candidates:
+        distance = prefix_edit_distance(query, index.texts[text_index], max_distance)
+        if distance is not None:
+            scores[text_index] = 1.0 - distance / len(query)
+    return scores
+
+
+class KanjiEngine:
+    """Component and Kanji queries over a loaded KanjiData."""
+
+    def __init__(self, data):
+        self.data = data
+
+    @classmethod
+    def load(cls, data_file=DATA_FILE, kanjidic_file=KANJIDIC_FILE):
+        """Loads the data (from the binary bundle when it is up to date) and returns an engine over it."""
+        return cls(KanjiData.load(data_file, kanjidic_file))
+
+    def find_matching_components(self, meanings):
+        """Finds components that have any of the specified meanings at the beginning of the word.
+
+        Returns ComponentMatch records in RADKFILE order.
+        """
+        return self.components_in_token_ranges(self.meaning_token_range(meaning) for meaning in set(meanings))
+
+    def meaning_token_range(self, meaning, start=0, end=None):
+        """Returns the (start, end) range of the meaning tokens that begin with meaning.
+
+        A known range that contains the result, such as the range of a shorter prefix, can be
+        passed to narrow the search.
+        """
+        tokens = self.data.meaning_tokens
+        prefix = meaning.lower()
+        if end is None:
+            end = len(tokens)
+        # Every token starting with prefix sorts between prefix and prefix + the highest code point
+        start = bisect_left(tokens, prefix, start, end)
+        end = bisect_left(tokens, prefix + '\U0010ffff', start, end)
+        return start, end
+
+    def components_in_token_ranges(self, token_ranges):
+        """Returns the ComponentMatch records owning the tokens of the given ranges, in RADKFILE order."""
+        rows = set()
+        for start, end in token_ranges:
+            rows.update(self.data.meaning_token_rows[start:end])
+
+        matching_components = []
+        for row in sorted(rows):
+            component = self.data.component_names[row]
+            details = self.data.components[component]
+            matching_components.append(ComponentMatch(component, details['meaning'], int(details.get('stroke_count') or 0)))
+        return matching_components
+
+    def rank_matching_components(self, meanings, limit=None):
+        """Finds components with meanings that start with, or within a few typos of, any of the meanings.
+
+        Returns RankedComponentMatch records, best score first, then by stroke count.
+        """
+        scores = {}
+        for meaning in set(meanings):
+            for row, score in self.component_meaning_scores(meaning).items():
+                scores[row] = max(score, scores.get(row, 0.0))
+        return self.ranked_components(scores, limit)
+
+    def component_meaning_scores(self, meaning):
+        """Returns {component row: score} for the components matching one meaning, exactly or fuzzily."""
+        query = meaning.strip().lower()
+        if not query:
+            return {}
+        # Exact prefixes come from the prefix index, which also serves queries too short for typos
+        scores = self.token_range_scores(self.meaning_token_range(query))
+        if max_typos(query):
+            token_rows = self.data.meaning_token_rows
+            for token_index, score in fuzzy_scores(self.data.meaning_ngram_index(), query).items():
+                row = token_rows[token_index]
+                scores[row] = max(score, scores.get(row, 0.0))
+        return scores
+
+    def token_range_scores(self, token_range):
+        """Returns {component row: 1.0} for the components owning the meaning tokens of a range."""
+        start, end = token_range
+        return dict.fromkeys(self.data.meaning_token_rows[start:end], 1.0)
+
+    def ranked_components(self, scores, limit=None):
+        """Returns the RankedComponentMatch records of {component row: score}, best score first, then by stroke count."""
+        ranked = []
+        for row, score in scores.items():
+            component = self.data.component_names[row]
+            details = self.data.components[component]
+            # RADKFILE order breaks the remaining ties
+            ranked.append((-score, int(details.get('stroke_count') or 0), row, component, details['meaning']))
+        ranked.sort()
+        return [RankedComponentMatch(component, meaning, stroke_count, -negative_score)
+                for negative_score, stroke_count, _, component, meaning in ranked[:limit]]
+
+    def rank_kanji_by_meaning(self, meaning, limit=DEFAULT_FUZZY_LIMIT, common_only=False):
+        """Finds Kanji with a Kanjidic2 meaning that starts with, or within a few typos of, meaning.
+
+        Returns RankedKanjiMatch records, best score first, then in Kanji ID order. The meaning
+        index is built on the first call.
+        """
+        query = meaning.strip().lower()
+        if not query:
+            return []
+        index = self.data.kanji_meaning_ngram_index()
+        best = {}
+        for text_index, score in fuzzy_scores(index, query).items():
+            for kanji_id in self.data.kanji_meaning_ids[text_index]:
+                if common_only and not self.data.kanji_freq[kanji_id]:
+                    continue
+                if kanji_id not in best or score > best[kanji_id][0]:
+                    best[kanji_id] = (score, index.texts[text_index])
+        ranked = sorted(best.items(), key=lambda item: (-item[1][0], item[0]))[:limit]
+        return [RankedKanjiMatch(self.data.kanji_literals[kanji_id], text, score) for kanji_id, (score, text) in ranked]
+
+    def find_kanji_bitmap(self, selected_components, common_only=False):
+        """Returns the bitmap of Kanji IDs containing all the specified components."""
+        bitmaps = [self.data.component_bitmaps[component] for component in selected_components if component in self.data.component_bitmaps]
+        if not bitmaps:
+            return 0
+
+        bitmap = bitmaps[0]
+        for other in bitmaps[1:]:
+            bitmap &= other
+        if common_only:
+            bitmap = self.filter_common(bitmap)
+        return bitmap
+
+    def filter_common(self, bitmap):
+        """Keeps only the common Kanji of a bitmap."""
+        return bitmap & self.data.common_mask
+
+    def find_meanings_bitmap(self, meanings, common_only=False):
+        """Returns the bitmap of Kanji IDs that, for every meaning, contain a component matching it."""
+        bitmap = None
+        for meaning in meanings:
+            meaning_bitmap = 0
+            for match in self.find_matching_components([meaning]):
+                meaning_bitmap |= self.data.component_bitmaps[match.component]
+            bitmap = meaning_bitmap if bitmap is None else bitmap & meaning_bitmap
+            if not bitmap:
+                return 0
+
+        if bitmap is None:
+            return 0
+        if common_only:
+            bitmap &= self.data.common_mask
+        return bitmap
+
+    def count_kanji_with_all_components(self, selected_components, common_only=False):
+        """Counts the Kanji that contain all the specified components."""
+        return popcount(self.find_kanji_bitmap(selected_components, common_only))
+
+    def next_component_counts(self, selected_components, candidates=None, common_only=False, ranges=None):
+        """Counts, for every candidate component, the Kanji left if it were added to the selection.
+
+        Candidates default to every component; a count of 0 means the component never occurs with
+        the selection (within the common Kanji and attribute ranges, if given). Components already
+        selected count the current results.
+        """
+        if candidates is None:
+            candidates = self.data.component_names
+        if selected_components:
+            bitmap = self.find_kanji_bitmap(selected_components, common_only)
+        else:
+            bitmap = self.data.common_mask if common_only else (1 << len(self.data.kanji_literals)) - 1
+        if ranges:
+            bitmap = self.filter_ranges(bitmap, ranges)
+
+        bitmaps = self.data.component_bitmaps
+        return {component: popcount(bitmap & bitmaps[component]) if bitmap and component in bitmaps else 0
+                for component in candidates}
+
+    def find_kanji_with_all_components(self, selected_components, common_only=False, ranges=None, sort_by=None, descending=False):
+        """Finds Kanji that contain all the specified components, in Kanji ID (frequency, then stroke count) order.
+
+        ranges and sort_by optionally filter and order the results, see filter_ranges and sorted_kanji.
+        """
+        bitmap = self.find_kanji_bitmap(selected_components, common_only)
+        if ranges:
+            bitmap = self.filter_ranges(bitmap, ranges)
+        return self.sorted_kanji(bitmap, sort_by, descending)
+
+    def filter_ranges(self, bitmap, ranges):
+        """Keeps the Kanji of a bitmap with attributes in the given ranges.
+
+        ranges maps KANJI_ATTRIBUTES names to inclusive (low, high) ranges, where None leaves a
+        bound open. Kanji with an unknown value are dropped by any bounded range.
+        """
+        for attribute, (low, high) in ranges.items():
+            if low is None and high is None:
+                continue
+            bitmap &= self.data.attribute_index(attribute).range_bitmap(low, high)
+            if not bitmap:
+                break
+        return bitmap
+
+    def sorted_kanji(self, bitmap, sort_by=None, descending=False):
+        """Returns the Kanji of a bitmap ordered by one of KANJI_ATTRIBUTES, or in Kanji ID order without one.
+
+        Equal values keep Kanji ID order, and Kanji with an unknown value come last either way.
+        """
+        if sort_by is None or not bitmap:
+            return self.bitmap_kanji(bitmap)
+        index = self.data.attribute_index(sort_by)
+        # One selector byte per Kanji ID
+        selectors = bin(bitmap)[:1:-1].encode('ascii').translate(_BIT_SELECTORS).ljust(len(self.data.kanji_literals), b'\x00')
+        return index.sorted_kanji(selectors, descending)
+
+    def find_kanji_for_meanings(self, meanings, common_only=False):
+        """Finds Kanji that, for every meaning, contain a component matching it, in Kanji ID order."""
+        return self.bitmap_kanji(self.find_meanings_bitmap(meanings, common_only))
+
+    def bitmap_kanji(self, bitmap):
+        """Returns the Kanji of a bitmap in Kanji ID order."""
+        if not bitmap:
+            return []
+
+        # Bit i of the bitmap is character i of the reversed binary string
+        bits = bin(bitmap)[:1:-1]
+        if bits.count('1') > DENSE_BITMAP_THRESHOLD:
+            # Dense results are cheaper to select in one C-level pass over every Kanji ID
+            return list(compress(self.data.kanji_literals, bits.encode('ascii').translate(_BIT_SELECTORS)))
+
+        matching_kanji = []
+        kanji_id = bits.find('1')
+        while kanji_id != -1:
+            matching_kanji.append(self.data.kanji_literals[kanji_id])
+            kanji_id = bits.find('1', kanji_id + 1)
+        return matching_kanji
+
+    def kanji_components(self, kanji):
+        """Returns the ComponentMatch records of the components of a Kanji, in RADKFILE order."""
+        kanji_id = self.data.kanjidic_index.get(kanji)
+        if kanji_id is None:
+            return []
+        return [self.component_record(row) for row in self.data.kanji_component_rows_of(kanji_id)]
+
+    def component_record(self, row):
+        """Returns the ComponentMatch record of a component row."""
+        component = self.data.component_names[row]
+        details = self.data.components[component]
+        return ComponentMatch(component, details.get('meaning', ""), int(details.get('stroke_count') or 0))
+
+    def decompose_text(self, text, details=True):
+        """Yields a CharacterBreakdown for every known Kanji of a text, in text order.
+
+        Each distinct Kanji is looked up once, so whole documents cost one dict lookup per character.
+        """
+        breakdowns = {}
+        kanjidic_index = self.data.kanjidic_index
+        for position, character in enumerate(text):
+            breakdown = breakdowns.get(character)
+            if breakdown is None:
+                if character not in kanjidic_index:
+                    continue
+                breakdown = breakdowns[character] = CharacterBreakdown(
+                    position, character, self.kanji_components(character), self.kanji_details(character) if details else None)
+            elif breakdown.position != position:
+                breakdown = breakdown._replace(position=position)
+            yield breakdown
+
+    def is_common_kanji(self, kanji):
+        """Checks if a Kanji is considered common based on the presence of a frequency value in Kanjidic2."""
+        kanji_id = self.data.kanjidic_index.get(kanji)
+        if kanji_id is not None:
+            return self.data.kanji_freq[kanji_id] != 0
+        return False
+
+    def find_kanji_in_kanjidic(self, kanji):
+        """Finds the raw Kanjidic2 entry of a Kanji."""
+        kanji_id = self.data.kanjidic_index.get(kanji)
+        if kanji_id is not None:
+            return self.data.kanji_entries[kanji_id]
+        return None
+
+    def kanji_details(self, kanji):
+        """Returns the KanjiDetails of a Kanji, or None if it is not in Kanjidic2."""
+        kanji_entry = self.find_kanji_in_kanjidic(kanji)
+        if kanji_entry:
+            return self.extract_kanji_details(kanji_entry)
+        return None
+
+    def extract_kanji_details(self, kanji_entry):
+        """Extracts details from a Kanjidic2 character entry (JSON format)."""
+        reading_meaning = kanji_entry.get('reading_meaning', {})
+        readings = reading_meaning.get('reading', [])
+        return KanjiDetails(
+            literal=kanji_entry.get('literal', ''),
+            meanings=list(reading_meaning.get('meaning', [])),
+            readings_on=[r['value'] for r in readings if r['r_type'] == 'ja_on'],
+            readings_kun=[r['value'] for r in readings if r['r_type'] == 'ja_kun'],
+            grade=_optional_int(kanji_entry.get('grade')),
+            stroke_count=_optional_int(kanji_entry.get('stroke_count')),
+            freq=_optional_int(kanji_entry.get('freq')),
+            jlpt=_optional_int(kanji_entry.get('jlpt')),
+        )
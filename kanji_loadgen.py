@@ -0,0 +1,157 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+# Copyright 2025 stormoid
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Load generator for the Fast Kanji lookup service (kanji_server.py).
+
+Opens keep-alive connections to a local server and replays a mix of component, Kanji and
+detail lookups for a fixed duration, then reports throughput and latency percentiles:
+
+    python kanji_server.py &
+    python kanji_loadgen.py --connections 16 --duration 10
+
+With --spawn the server is started (and stopped) by the load generator itself.
+"""
+import argparse
+import asyncio
+import os
+import random
+import subprocess
+import sys
+import time
+from urllib.parse import quote
+
+from kanji_server import DEFAULT_HOST, DEFAULT_PORT
+
+MEANINGS = ["tree", "sun", "mouth", "water", "person", "one", "fire", "heart", "hand", "dot",
+            "lid", "ten", "go", "mo", "s", "gr", "big", "small", "rain", "gold"]
+COMPONENTS = ["口", "一", "｜", "ノ", "木", "日", "亠", "十", "乃", "氵", "艹", "女"]
+KANJI = ["木", "日", "東", "森", "語", "話", "読", "書", "漢", "字", "明", "暗"]
+
+
+def build_requests(count, seed=0):
+    """Builds a reproducible mix of raw GET requests."""
+    rng = random.Random(seed)
+    requests = []
+    for _ in range(count):
+        kind = rng.random()
+        if kind < 0.4:
+            target = "/components?meanings=" + quote(",".join(rng.sample(MEANINGS, rng.randint(1, 2))))
+        elif kind < 0.8:
+            target = "/kanji?components=" + quote(",".join(rng.sample(COMPONENTS, rng.randint(1, 3))))
+        else:
+            target = "/details?kanji=" + quote(rng.choice(KANJI))
+        requests.append(f"GET {target} HTTP/1.1\r\nHost: localhost\r\n\r\n".encode('ascii'))
+    return requests
+
+
+async def read_response(reader):
+    """Reads one HTTP response, returning its status code."""
+    status_line = await reader.readline()
+    if not status_line:
+        raise ConnectionError("server closed the connection")
+    length = 0
+    while True:
+        line = await reader.readline()
+        if line in (b"\r\n", b""):
+            break
+        name, _, value = line.partition(b":")
+        if name.strip().lower() == b"content-length":
+            length = int(value)
+    await reader.readexactly(length)
+    return int(status_line.split()[1])
+
+
+async def client(host, port, requests, deadline, latencies, errors):
+    """Sends requests over one keep-alive connection until the deadline."""
+    reader, writer = await asyncio.open_connection(host, port)
+    try:
+        index = random.randrange(len(requests))
+        while time.perf_counter() < deadline:
+            start = time.perf_counter()
+            writer.write(requests[index])
+            status = await read_response(reader)
+            latencies.append(time.perf_counter() - start)
+            if status != 200:
+                errors.append(status)
+            index = (index + 1) % len(requests)
+    finally:
+        writer.close()
+
+
+async def run_load(host, port, connections, duration, requests):
+    latencies = []
+    errors = []
+    deadline = time.perf_counter() + duration
+    start = time.perf_counter()
+    await asyncio.gather(*(client(host, port, requests, deadline, latencies, errors) for _ in range(connections)))
+    return latencies, errors, time.perf_counter() - start
+
+
+def percentile(sorted_values, fraction):
+    return sorted_values[min(len(sorted_values) - 1, int(fraction * len(sorted_values)))]
+
+
+async def wait_for_server(host, port, timeout=30.0):
+    """Waits until the server accepts connections."""
+    deadline = time.perf_counter() + timeout
+    while True:
+        try:
+            _, writer = await asyncio.open_connection(host, port)
+            writer.close()
+            return
+        except OSError:
+            if time.perf_counter() > deadline:
+                raise
+            await asyncio.sleep(0.1)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Load generator for the local Kanji lookup service.")
+    parser.add_argument('--host', default=DEFAULT_HOST)
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT)
+    parser.add_argument('--connections', type=int, default=16, help="concurrent keep-alive connections (default: 16)")
+    parser.add_argument('--duration', type=float, default=10.0, help="seconds to run (default: 10)")
+    parser.add_argument('--distinct', type=int, default=1000, help="distinct requests in the mix (default: 1000)")
+    parser.add_argument('--spawn', action='store_true', help="start the server in a subprocess for the run")
+    args = parser.parse_args(argv)
+
+    server = None
+    if args.spawn:
+        server_script = os.path.join(os.path.dirname(os.path.abspath(__file__)), "kanji_server.py")
+        server = subprocess.Popen([sys.executable, server_script, "--host", args.host, "--port", str(args.port)])
+    try:
+        asyncio.run(wait_for_server(args.host, args.port))
+        latencies, errors, elapsed = asyncio.run(run_load(args.host, args.port, args.connections, args.duration,
+                                                          build_requests(args.distinct)))
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait()
+
+    latencies.sort()
+    print(f"{len(latencies)} requests in {elapsed:.1f} s over {args.connections} connections: "
+          f"{len(latencies) / elapsed:.0f} req/s")
+    if latencies:
+        print(f"latency p50 {percentile(latencies, 0.5) * 1000:.2f} ms, p99 {percentile(latencies, 0.99) * 1000:.2f} ms, "
+              f"max {latencies[-1] * 1000:.2f} ms")
+    if errors:
+        print(f"{len(errors)} non-200 responses")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,167 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+# Copyright 2025 stormoid
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Opt-in timing instrumentation for Fast Kanji.
+
+Code wraps its stages in `with profiler.stage("name"):`. A disabled Profiler hands out one
+shared no-op context, so the instrumentation costs next to nothing when it is off. An enabled
+one keeps a log-scale histogram per stage and a bounded list of events, which can be shown as
+text or dumped as JSON or in the Chrome trace format (chrome://tracing, Perfetto).
+"""
+import contextlib
+import json
+import os
+import threading
+import time
+from collections import deque
+
+# Histogram bucket i holds durations of [2^(i-1), 2^i) microseconds
+HISTOGRAM_BUCKETS = 32
+DEFAULT_MAX_EVENTS = 10000
+
+_DISABLED_STAGE = contextlib.nullcontext()
+
+
+class StageHistogram:
+    """Count, total, extremes and log2-bucketed distribution of one stage's durations."""
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.min = float('inf')
+        self.max = 0.0
+        self.buckets = [0] * HISTOGRAM_BUCKETS
+
+    def add(self, duration):
+        self.count += 1
+        self.total += duration
+        self.min = min(self.min, duration)
+        self.max = max(self.max, duration)
+        self.buckets[min(HISTOGRAM_BUCKETS - 1, int(duration * 1e6).bit_length())] += 1
+
+    def percentile(self, fraction):
+        """Returns the upper bound of the bucket holding the given fraction of samples, in seconds."""
+        target = fraction * self.count
+        seen = 0
+        for index, count in enumerate(self.buckets):
+            seen += count
+            if count and seen >= target:
+                return min(self.max, (1 << index) / 1e6)
+        return self.max
+
+    def to_dict(self):
+        return {
+            'count': self.count,
+            'total_ms': self.total * 1000,
+            'mean_ms': self.total / self.count * 1000 if self.count else 0.0,
+            'min_ms': self.min * 1000 if self.count else 0.0,
+            'max_ms': self.max * 1000,
+            'p50_ms': self.percentile(0.5) * 1000,
+            'p99_ms': self.percentile(0.99) * 1000,
+            'buckets_us': {f"<{1 << index}": count for index, count in enumerate(self.buckets) if count},
+        }
+
+
+class _Stage:
+    """Times one stage and records it on exit."""
+
+    __slots__ = ('profiler', 'name', 'start')
+
+    def __init__(self, profiler, name):
+        self.profiler = profiler
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.profiler.record(self.name, self.start)
+        return False
+
+
+class Profiler:
+    """Collects stage timings when enabled."""
+
+    def __init__(self, enabled=False, max_events=DEFAULT_MAX_EVENTS):
+        self.enabled = enabled
+        self.histograms = {}
+        self.events = deque(maxlen=max_events)
+        self.origin = time.perf_counter()
+        self.lock = threading.Lock()
+
+    def stage(self, name):
+        """Returns a context manager timing the enclosed code as the named stage."""
+        if not self.enabled:
+            return _DISABLED_STAGE
+        return _Stage(self, name)
+
+    def now(self):
+        """Returns a start time for record(), or None when disabled."""
+        return time.perf_counter() if self.enabled else None
+
+    def record(self, name, start, end=None):
+        """Records a stage that ran from start (a time.perf_counter() value) until end or now."""
+        if not self.enabled or start is None:
+            return
+        if end is None:
+            end = time.perf_counter()
+        with self.lock:
+            histogram = self.histograms.get(name)
+            if histogram is None:
+                histogram = self.histograms[name] = StageHistogram()
+            histogram.add(end - start)
+            self.events.append((name, start, end - start, threading.get_ident()))
+
+    def reset(self):
+        with self.lock:
+            self.histograms.clear()
+            self.events.clear()
+
+    def summary(self):
+        """Returns the per-stage statistics as a dict."""
+        with self.lock:
+            return {name: histogram.to_dict() for name, histogram in self.histograms.items()}
+
+    def format_summary(self):
+        """Returns the per-stage statistics as aligned text lines."""
+        lines = [f"{'stage':24} {'count':>7} {'p50 ms':>9} {'p99 ms':>9} {'max ms':>9}"]
+        for name, stats in self.summary().items():
+            lines.append(f"{name:24} {stats['count']:7} {stats['p50_ms']:9.3f} {stats['p99_ms']:9.3f} {stats['max_ms']:9.3f}")
+        return "\n".join(lines)
+
+    def chrome_trace(self):
+        """Returns the recorded events in the Chrome trace event format."""
+        with self.lock:
+            events = list(self.events)
+        pid = os.getpid()
+        return {
+            'traceEvents': [
+                {'name': name, 'ph': 'X', 'ts': (start - self.origin) * 1e6, 'dur': duration * 1e6, 'pid': pid, 'tid': tid}
+                for name, start, duration, tid in events
+            ],
+            'displayTimeUnit': 'ms',
+        }
+
+    def dump_json(self, path):
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(self.summary(), f, indent=2)
+
+    def dump_chrome_trace(self, path):
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(self.chrome_trace(), f)
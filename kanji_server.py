@@ -0,0 +1,257 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+# Copyright 2025 stormoid
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Local HTTP/JSON lookup service for Fast Kanji.
+
+    python kanji_server.py --port 8765
+
+Endpoints (GET with query parameters, lists comma-separated):
+    /components?meanings=tree,sun                         matching components
+    /components?meanings=moutn&fuzzy=1                    ... ranked, tolerating typos
+    /kanji?components=木,日&meanings=...&common_only=0    Kanji with all the components / meanings
+    /kanji?components=木&strokes=1-8&jlpt=3-&sort=-grade  ... filtered by attribute ranges and sorted
+    /details?kanji=木,日                                  Kanjidic2 details
+    /decompose?text=日本語&details=1                      components (and details) of every Kanji in a text
+    /stats                                                cache statistics
+
+POST to /components, /kanji, /details or /decompose with a JSON object, or a JSON list of them to batch
+several queries in one request; the response is the matching result or list of results.
+Connections are kept alive (HTTP/1.1) and results of hot queries are kept in an LRU cache.
+Exercise it with kanji_loadgen.py.
+"""
+import argparse
+import asyncio
+import contextlib
+import json
+import sys
+from urllib.parse import parse_qs, urlsplit
+
+from kanji_cli import normalize_query, run_query
+from kanji_engine import KANJI_ATTRIBUTES, KanjiEngine, LRUCache
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8765
+DEFAULT_CACHE_SIZE = 4096
+MAX_BODY_SIZE = 1 << 20
+# Larger results (such as whole decomposed documents) are not cached, which bounds the cache to
+# about DEFAULT_CACHE_SIZE * MAX_CACHED_SIZE bytes
+MAX_CACHED_SIZE = 16 << 10
+
+_REASONS = {200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed", 413: "Payload Too Large"}
+
+
+class RequestError(Exception):
+    """An error reported to the client with an HTTP status."""
+
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+def _split_list(values):
+    """Flattens repeated and comma-separated query parameter values."""
+    return [item.strip() for value in values for item in value.split(',') if item.strip()]
+
+
+def _parse_flag(value):
+    return str(value).lower() not in ('0', 'false', 'no', '')
+
+
+def _parse_range(value):
+    """Parses "low-high", "low-" or "-high" into [low, high]."""
+    low, separator, high = value.partition('-')
+    if not separator:
+        low = high = value
+    return [int(low) if low.strip() else None, int(high) if high.strip() else None]
+
+
+class KanjiServer:
+    """Answers the lookup endpoints from one engine, caching the encoded results."""
+
+    def __init__(self, engine, cache_size=DEFAULT_CACHE_SIZE):
+        self.engine = engine
+        self.cache = LRUCache(cache_size)
+        self.requests = 0
+        self.endpoints = {
+            '/components': self.components_query,
+            '/kanji': self.kanji_query,
+            '/details': self.details_query,
+            '/decompose': self.decompose_query,
+        }
+
+    def components_query(self, query):
+        meanings = query.get('meanings', [])
+        if isinstance(meanings, str):
+            meanings = [meanings]
+        meanings = [str(m).strip() for m in meanings if str(m).strip()]
+        if query.get('fuzzy'):
+            return [match._asdict() for match in self.engine.rank_matching_components(meanings)]
+        return [match._asdict() for match in self.engine.find_matching_components(meanings)]
+
+    def kanji_query(self, query):
+        return run_query(self.engine, normalize_query(query), details=bool(query.get('details', False)))
+
+    def details_query(self, query):
+        kanji = query.get('kanji', [])
+        if isinstance(kanji, str):
+            kanji = [kanji]
+        results = [self.engine.kanji_details(literal) for literal in kanji]
+        return [details._asdict() if details else None for details in results]
+
+    def decompose_query(self, query):
+        details = bool(query.get('details', False))
+        return [breakdown.to_dict() for breakdown in self.engine.decompose_text(str(query.get('text', "")), details)]
+
+    def query_from_params(self, path, params):
+        """Builds the query object of a GET request."""
+        query = {}
+        for key in ('meanings', 'components', 'kanji'):
+            if key in params:
+                query[key] = _split_list(params[key])
+        if 'common_only' in params:
+            query['common_only'] = _parse_flag(params['common_only'][-1])
+        if path == '/kanji' and 'details' in params:
+            query['details'] = _parse_flag(params['details'][-1])
+        if path == '/kanji':
+            ranges = {attribute: _parse_range(params[attribute][-1]) for attribute in KANJI_ATTRIBUTES if attribute in params}
+            if ranges:
+                query['ranges'] = ranges
+            if 'sort' in params:
+                sort = params['sort'][-1]
+                query['sort_by'] = sort.lstrip('-')
+                query['descending'] = sort.startswith('-')
+        if path == '/components' and 'fuzzy' in params:
+            query['fuzzy'] = _parse_flag(params['fuzzy'][-1])
+        if path == '/decompose':
+            query['text'] = "".join(params.get('text', []))
+            if 'details' in params:
+                query['details'] = _parse_flag(params['details'][-1])
+        return query
+
+    def run_cached(self, path, query):
+        """Runs one query object against an endpoint, returning its encoded JSON result."""
+        if not isinstance(query, dict):
+            raise RequestError(400, "a query must be a JSON object")
+        key = path + json.dumps(query, sort_keys=True, ensure_ascii=False)
+        body = self.cache.get(key)
+        if body is None:
+            try:
+                result = self.endpoints[path](query)
+            except (ValueError, TypeError) as e:
+                raise RequestError(400, str(e))
+            body = json.dumps(result, ensure_ascii=False).encode('utf-8')
+            if len(key) + len(body) <= MAX_CACHED_SIZE:
+                self.cache.put(key, body)
+        return body
+
+    def handle(self, method, target, body):
+        """Handles one request, returning (status, encoded JSON body)."""
+        url = urlsplit(target)
+        path = url.path.rstrip('/') or '/'
+        if path == '/stats':
+            stats = {'requests': self.requests, 'cache': self.cache.stats()}
+            return 200, json.dumps(stats).encode('utf-8')
+        if path not in self.endpoints:
+            raise RequestError(404, f"unknown endpoint '{path}'")
+
+        if method == 'GET':
+            try:
+                query = self.query_from_params(path, parse_qs(url.query))
+            except ValueError as e:
+                raise RequestError(400, f"invalid parameter: {e}")
+            return 200, self.run_cached(path, query)
+        if method != 'POST':
+            raise RequestError(405, f"method {method} not allowed")
+
+        try:
+            query = json.loads(body.decode('utf-8') or "{}")
+        except ValueError as e:
+            raise RequestError(400, f"invalid JSON body: {e}")
+        if isinstance(query, list):
+            # Batch: join the already encoded results into one JSON list
+            return 200, b"[" + b",".join(self.run_cached(path, item) for item in query) + b"]"
+        return 200, self.run_cached(path, query)
+
+    async def handle_connection(self, reader, writer):
+        """Serves requests on one connection until the client closes it or asks to."""
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                method, target, version = request_line.decode('latin-1').split()
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b"\r\n", b"\n", b""):
+                        break
+                    name, _, value = line.decode('latin-1').partition(':')
+                    headers[name.strip().lower()] = value.strip()
+
+                connection = headers.get('connection', '').lower()
+                keep_alive = connection == 'keep-alive' if version == 'HTTP/1.0' else connection != 'close'
+
+                self.requests += 1
+                length = int(headers.get('content-length') or 0)
+                try:
+                    if length > MAX_BODY_SIZE:
+                        keep_alive = False
+                        raise RequestError(413, "request body too large")
+                    body = await reader.readexactly(length) if length else b""
+                    status, payload = self.handle(method, target, body)
+                except RequestError as e:
+                    status, payload = e.status, json.dumps({'error': str(e)}).encode('utf-8')
+
+                writer.write(
+                    f"HTTP/1.1 {status} {_REASONS[status]}\r\n"
+                    f"Content-Type: application/json; charset=utf-8\r\n"
+                    f"Content-Length: {len(payload)}\r\n"
+                    f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n".encode('latin-1') + payload)
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError, ValueError):
+            # Dropped connections and malformed request lines just end the connection
+            pass
+        finally:
+            writer.close()
+
+
+async def serve(server, host=DEFAULT_HOST, port=DEFAULT_PORT):
+    """Runs the HTTP server until cancelled."""
+    http_server = await asyncio.start_server(server.handle_connection, host, port)
+    print(f"Fast Kanji lookup service listening on http://{host}:{port}", file=sys.stderr)
+    async with http_server:
+        await http_server.serve_forever()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Local HTTP/JSON Kanji lookup service.")
+    parser.add_argument('--host', default=DEFAULT_HOST, help=f"address to bind (default: {DEFAULT_HOST})")
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT, help=f"port to listen on (default: {DEFAULT_PORT})")
+    parser.add_argument('--cache-size', type=int, default=DEFAULT_CACHE_SIZE,
+                        help=f"number of query results kept in the LRU cache (default: {DEFAULT_CACHE_SIZE})")
+    args = parser.parse_args(argv)
+
+    server = KanjiServer(KanjiEngine.load(), args.cache_size)
+    with contextlib.suppress(KeyboardInterrupt):
+        asyncio.run(serve(server, args.host, args.port))
+
+
+if __name__ == "__main__":
+    main()